@@ -0,0 +1,383 @@
+"""Benchmarks for the translate.py pipeline on synthetic catalogs.
+
+    python bench.py                                # 1k, 10k, 100k and 1M filters
+    python bench.py --sizes 1000 10000 --miss-rate 0.3
+    python bench.py --baseline bench-results/20261018T120000Z.json
+
+Each size gets a generated catalog. Prompts are stitched from sentences of
+the real prompts.json, so they have realistic lengths and shared
+boilerplate. The catalog mixes already-translated and pending entries and
+includes master prompts with variables. ``--miss-rate`` is the share of
+pending names, and separately of pending descriptions, that are absent
+from names_map/desc_map.
+
+Every size is measured in a fresh subprocess. The stages are load,
+translate, serialize and write, plus the --stream pass end to end. The
+fragments stage times the shared-fragment compaction that every --build
+runs (see fragments.py), and the build stage all of the --build artifacts
+(see bundles.py); it fails if the generated master prompts do not compile.
+Each stage records ``rss_delta_mb``, the change in
+resident memory across the stage, and ``peak_rss_mb``. On Linux the
+kernel's peak counter is reset before each stage, so that peak belongs to
+the stage (``peak_rss_scope: "stage"``). Elsewhere it is the process-wide
+high-water mark so far (``"process"``). Results go to
+bench-results/<UTC timestamp>.json. They are compared with the previous
+results file, or with --baseline, and stages that got slower by more than
+--threshold are flagged. Results generated with a different --miss-rate,
+--pending-rate or --seed are not compared.
+
+The 1M catalog is about 1.3 GB on disk. Its in-memory stages need several
+GB of RAM; pass --sizes to leave it out on small machines.
+"""
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import translate
+from bundles import build_artifacts
+from fragments import compact_prompts, split_sentences
+from streaming import atomic_writer, stream_catalog
+from templates import PLACEHOLDER
+
+DATA_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = DATA_DIR / 'bench-results'
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_MISS_RATE = 0.1
+DEFAULT_PENDING_RATE = 0.5
+DEFAULT_THRESHOLD = 0.15
+PROMPT_MEAN, PROMPT_STDEV = 757, 200
+VARIABLE_IDS = ('BACKGROUND', 'SKIN_RETOUCH_LEVEL', 'LIP_DECOR', 'EYE_EFFECT', 'HAND_ACCESSORY', 'EXTRAS')
+RESULTS_VERSION = 1
+
+
+def _proc_status_mb(field):
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (Linux >= 4.0). Returns False where that is unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+PEAK_RSS_SCOPE = 'stage' if _reset_peak_rss() else 'process'
+
+
+def _peak_rss_mb():
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def _corpus():
+    try:
+        data = json.loads(translate.PROMPTS_PATH.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return ['Edit the uploaded photo and enhance its quality. ', 'Preserve face identity 100% identical. ']
+    sentences = [s for f in data['filters'] for s in split_sentences(f['prompt'])]
+    return sentences or ['Edit the uploaded photo. ']
+
+
+def _master_corpus(corpus):
+    """Corpus sentences without their own ``[PLACEHOLDER]`` tokens, which no bench master declares."""
+    sentences = [PLACEHOLDER.sub('', s) for s in corpus]
+    return [s for s in sentences if s.strip()] or ['Edit the uploaded photo. ']
+
+
+def _prompt(rng, corpus):
+    target = max(80, int(rng.gauss(PROMPT_MEAN, PROMPT_STDEV)))
+    parts, size = [], 0
+    while size < target:
+        sentence = rng.choice(corpus)
+        parts.append(sentence)
+        size += len(sentence)
+    return ''.join(parts).rstrip()
+
+
+def _filter(i, rng, corpus, miss_rate, pending_rate):
+    name_src, name = rng.choice(list(translate.names_map.items()))
+    desc_src, desc = rng.choice(list(translate.desc_map.items()))
+    item = {
+        'id': f'bench-{i}',
+        'categoryId': f'cat-{i % 12}',
+        'name_ka': name['ka'],
+        'name_ru': name['ru'],
+        'name_en': name_src,
+        'prompt': _prompt(rng, corpus),
+        'previewUrl': f'/filters/bench/{i}/after.webp',
+        'description_ka': desc['ka'],
+        'description_ru': desc['ru'],
+        'description_en': desc_src,
+        'isPopular': rng.random() < 0.1,
+    }
+    if rng.random() < pending_rate:
+        # Pending entry: English still sitting in the *_ka/*_ru fields, like a freshly added filter.
+        # Name and description miss their map independently.
+        name_missed = rng.random() < miss_rate
+        desc_missed = rng.random() < miss_rate
+        item['name_ka'] = item['name_ru'] = f'{name_src} #{i}' if name_missed else name_src
+        item['description_ka'] = item['description_ru'] = f'{desc_src} #{i}' if desc_missed else desc_src
+    return item
+
+
+def _master_prompt(i, rng, corpus):
+    variable_ids = rng.sample(VARIABLE_IDS, rng.randint(3, len(VARIABLE_IDS)))
+    template = _prompt(rng, corpus) + ' ' + ' '.join(f'{v}: [{v}].' for v in variable_ids)
+    variables = []
+    for var_id in variable_ids:
+        multi = var_id == 'EXTRAS'
+        options = [{
+            'id': f'opt-{k}',
+            'value': rng.choice(corpus).strip(),
+            'label_en': f'Option {k}',
+            'label_ru': f'Вариант {k}',
+            'label_ka': f'ვარიანტი {k}',
+        } for k in range(rng.randint(4, 8))]
+        variables.append({
+            'id': var_id,
+            'type': 'multi-select' if multi else 'select',
+            'label_en': var_id.title(),
+            'label_ru': var_id.title(),
+            'label_ka': var_id.title(),
+            'default': [] if multi else options[0]['id'],
+            'options': options,
+        })
+    return {
+        'id': f'bench-master-{i}', 'categoryId': 'cat-0',
+        'name_en': f'Master {i}', 'name_ru': f'Мастер {i}', 'name_ka': f'მასტერი {i}',
+        'description_en': '', 'description_ru': '', 'description_ka': '',
+        'previewUrl': '', 'prompt': template, 'sortOrder': i, 'variables': variables,
+    }
+
+
+def generate_catalog(path, size, miss_rate=DEFAULT_MISS_RATE, pending_rate=DEFAULT_PENDING_RATE, seed=0):
+    """Write a synthetic catalog of ``size`` filters to path without holding it in memory."""
+    rng = random.Random(seed)
+    corpus = _corpus()
+    categories = [{'id': f'cat-{c}', 'label_ka': f'კატეგორია {c}', 'label_ru': f'Категория {c}',
+                   'label_en': f'Category {c}', 'icon': 'Sparkle', 'count': 0, 'sortOrder': c} for c in range(12)]
+    master_corpus = _master_corpus(corpus)
+    masters = [_master_prompt(i, rng, master_corpus) for i in range(max(1, min(size // 1000, 200)))]
+
+    def dumps(value):
+        return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+
+    with atomic_writer(path) as f:
+        head = json.dumps({'categories': categories, 'subcategories': []}, indent=2, ensure_ascii=False)
+        f.write((head[:-2] + ',\n  "filters": [').encode('utf-8'))
+        for i in range(size):
+            sep = '\n    ' if i == 0 else ',\n    '
+            f.write((sep + dumps(_filter(i, rng, corpus, miss_rate, pending_rate))).encode('utf-8'))
+        tail = json.dumps(masters, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        f.write(('\n  ],\n  "masterPrompts": ' + tail + '\n}\n').encode('utf-8'))
+
+
+def _begin():
+    """Start a stage: reset the peak-RSS counter where possible and note the current RSS."""
+    if PEAK_RSS_SCOPE == 'stage':
+        _reset_peak_rss()
+    return time.perf_counter(), _proc_status_mb('VmRSS')
+
+
+def _stage(results, name, started, entries, nbytes):
+    began, rss_before = started
+    elapsed = time.perf_counter() - began
+    rss_after = _proc_status_mb('VmRSS')
+    results[name] = {
+        'seconds': round(elapsed, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_delta_mb': round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+        'entries_per_s': round(entries / elapsed, 1) if elapsed else None,
+        'mb_per_s': round(nbytes / (1 << 20) / elapsed, 2) if elapsed else None,
+    }
+
+
+def run_worker(path, mode):
+    """Time the in-memory pipeline (or the streaming pass) on one catalog; print JSON."""
+    size = path.stat().st_size
+    stages = {}
+    lookup = translate.MapLookup()
+
+    out_path = path.with_suffix('.out.json')
+    out_path.unlink(missing_ok=True)
+
+    if mode == 'stream':
+        counters = {'translated': 0, 'untranslated': 0, 'fuzzy': 0}
+        started = _begin()
+        _, seen, _ = stream_catalog(path, out_path, [translate.translate_stage(lookup, counters)])
+        _stage(stages, 'stream', started, seen, size)
+        print(json.dumps({'stages': stages, 'peak_rss_scope': PEAK_RSS_SCOPE, 'filters': seen,
+                          'translated': counters['translated'], 'untranslated': counters['untranslated'],
+                          'output_bytes': out_path.stat().st_size}))
+        return
+
+    started = _begin()
+    raw = path.read_bytes()
+    data = json.loads(raw)
+    del raw
+    filters = data['filters']
+    _stage(stages, 'load', started, len(filters), size)
+
+    started = _begin()
+    names, descs, _ = lookup.resolve(filters)
+    translated = sum(translate.translate_filter(item, names, descs) for item in filters)
+    untranslated = sum(translate._is_pending(item, names, descs) for item in filters)
+    _stage(stages, 'translate', started, len(filters), size)
+
+    started = _begin()
+    payload = translate.serialize(data)
+    _stage(stages, 'serialize', started, len(filters), len(payload))
+
+    started = _begin()
+    with atomic_writer(out_path) as f:
+        f.write(payload)
+    _stage(stages, 'write', started, len(filters), len(payload))
+
+    started = _begin()
+    _, fragment_stats = compact_prompts(data)
+    _stage(stages, 'fragments', started, fragment_stats.prompts, fragment_stats.original_bytes)
+
+    started = _begin()
+    artifacts = build_artifacts(data)
+    _stage(stages, 'build', started, len(filters), sum(len(payload) for payload in artifacts.values()))
+    del artifacts
+
+    print(json.dumps({'stages': stages, 'peak_rss_scope': PEAK_RSS_SCOPE, 'filters': len(filters),
+                      'translated': translated, 'untranslated': untranslated, 'output_bytes': len(payload)}))
+
+
+def _measure(path, mode):
+    out = subprocess.run([sys.executable, __file__, '--worker', str(path), '--mode', mode],
+                         check=True, capture_output=True, text=True, cwd=DATA_DIR)
+    return json.loads(out.stdout)
+
+
+def run_benchmarks(sizes, miss_rate, pending_rate, seed):
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='glow-bench-') as tmp:
+        for size in sizes:
+            path = Path(tmp) / f'catalog-{size}.json'
+            started = time.perf_counter()
+            generate_catalog(path, size, miss_rate, pending_rate, seed)
+            generated = time.perf_counter() - started
+            run = {'size': size, 'input_bytes': path.stat().st_size, 'generate_seconds': round(generated, 3)}
+            run.update(_measure(path, 'memory'))
+            run['stages'].update(_measure(path, 'stream')['stages'])
+            runs.append(run)
+            print(format_run(run), flush=True)
+            path.unlink()
+    return runs
+
+
+def format_run(run):
+    parts = [f"{run['size']:>9} filters  {run['input_bytes'] / (1 << 20):8.1f} MB in"]
+    for name, stage in run['stages'].items():
+        parts.append(f"{name} {stage['seconds']:.3f}s/{stage['peak_rss_mb']:.0f}MB")
+    return '  '.join(parts)
+
+
+def compare(current, baseline, threshold):
+    """Lines describing stages that got slower than ``threshold`` relative to the baseline."""
+    previous = {run['size']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in current['runs']:
+        before = previous.get(run['size'])
+        if not before:
+            continue
+        for name, stage in run['stages'].items():
+            old = before['stages'].get(name)
+            if not old or not old['seconds']:
+                continue
+            change = stage['seconds'] / old['seconds'] - 1
+            if change > threshold:
+                regressions.append(f"{run['size']} filters, {name}: {old['seconds']:.3f}s -> "
+                                   f"{stage['seconds']:.3f}s (+{change:.0%})")
+    return regressions
+
+
+def param_changes(current, baseline):
+    """Lines for the generator params that differ; results are only comparable without any."""
+    before, after = baseline.get('params', {}), current.get('params', {})
+    return [f'{name} {before.get(name)} -> {after.get(name)}'
+            for name in sorted(set(before) | set(after)) if before.get(name) != after.get(name)]
+
+
+def _latest_results(exclude=None):
+    files = sorted(p for p in RESULTS_DIR.glob('*.json') if p != exclude)
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the translate.py pipeline on synthetic catalogs.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--miss-rate', type=float, default=DEFAULT_MISS_RATE,
+                        help='share of pending strings missing from names_map/desc_map')
+    parser.add_argument('--pending-rate', type=float, default=DEFAULT_PENDING_RATE,
+                        help='share of filters still holding English in their ka/ru fields')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, default=None,
+                        help='results file (default: bench-results/<UTC timestamp>.json)')
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help='results to compare against (default: the latest file in bench-results/)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'slowdown that counts as a regression (default: {DEFAULT_THRESHOLD:.0%})')
+    parser.add_argument('--worker', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=('memory', 'stream'), default='memory', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.mode)
+        return
+
+    baseline_path = args.baseline or _latest_results()
+    results = {
+        'version': RESULTS_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'miss_rate': args.miss_rate, 'pending_rate': args.pending_rate, 'seed': args.seed},
+        'runs': run_benchmarks(args.sizes, args.miss_rate, args.pending_rate, args.seed),
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_writer(output) as f:
+        f.write((json.dumps(results, indent=2) + '\n').encode('utf-8'))
+    print(f'Results written to {output}')
+
+    if baseline_path and baseline_path.exists() and baseline_path != output:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        changes = param_changes(results, baseline)
+        if changes:
+            print(f"Not compared with {baseline_path.name}: different params ({', '.join(changes)})")
+            return
+        regressions = compare(results, baseline, args.threshold)
+        print(f'Compared with {baseline_path.name}: {len(regressions)} regression(s)')
+        for line in regressions:
+            print(f'  {line}')
+
+
+if __name__ == '__main__':
+    main()
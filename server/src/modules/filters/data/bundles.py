@@ -0,0 +1,230 @@
+"""Precompiled artifacts built from prompts.json.
+
+* ``catalog.<locale>.json`` — compact metadata bundle per locale (no prompt text).
+* ``templates.json`` — compiled master prompts (see templates.py).
+* ``fragments.json`` — prompts deduplicated into shared fragments (see fragments.py).
+* ``search-index.json`` — multilingual name/description/category index (see search_index.py).
+* ``prompts.bin`` — prompt store: a fixed-width id index followed by the UTF-8
+  prompt blob, so a single prompt can be read by offset or via mmap without
+  parsing the rest of the catalog.
+
+prompts.bin layout (all integers little-endian)::
+
+    header   MAGIC(4) version:u16 id_width:u16 count:u32
+    index    count x [id:id_width bytes, NUL-padded][offset:u64][length:u32], sorted by id
+    blob     concatenated UTF-8 prompts; offsets are relative to the start of the blob
+
+The artifacts come from three builders, each reading one slice of the
+catalog: metadata (everything but prompt text) for the locale bundles and
+the search index, prompt text for prompts.bin and fragments.json, and the
+master prompts for templates.json. ``builder_inputs`` digests those slices
+so a build can skip builders whose input did not change.
+"""
+import hashlib
+import json
+import mmap
+import struct
+
+from fragments import FRAGMENTS_NAME, FRAGMENTS_VERSION, compact_prompts, format_stats
+from search_index import SEARCH_INDEX_NAME, SEARCH_INDEX_VERSION, SearchIndex
+from streaming import compact_json
+from templates import TEMPLATES_NAME, TEMPLATES_VERSION, compile_templates
+
+LOCALES = ('ka', 'ru', 'en')
+
+STORE_NAME = 'prompts.bin'
+STORE_MAGIC = b'GLWP'
+STORE_VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+ENTRY_TAIL = struct.Struct('<QI')
+
+
+def bundle_name(locale):
+    return f'catalog.{locale}.json'
+
+
+def _localize_category(category, locale):
+    out = {'id': category['id']}
+    if 'categoryId' in category:
+        out['categoryId'] = category['categoryId']
+    out['label'] = category[f'label_{locale}']
+    for key in ('icon', 'count', 'sortOrder'):
+        if key in category:
+            out[key] = category[key]
+    return out
+
+
+def _localize_filter(item, locale):
+    out = {'id': item['id'], 'categoryId': item['categoryId']}
+    if item.get('subcategoryId'):
+        out['subcategoryId'] = item['subcategoryId']
+    out['name'] = item[f'name_{locale}']
+    out['description'] = item[f'description_{locale}']
+    out['previewUrl'] = item['previewUrl']
+    if item.get('beforeUrl'):
+        out['beforeUrl'] = item['beforeUrl']
+    out['isPopular'] = item['isPopular']
+    return out
+
+
+def build_locale_bundle(data, locale):
+    """Metadata for one locale, mirroring filtersService.getMetadata() minus the other locales."""
+    return {
+        'locale': locale,
+        'categories': [_localize_category(c, locale) for c in data['categories']],
+        'subcategories': [_localize_category(s, locale) for s in data.get('subcategories', [])],
+        'filters': [_localize_filter(f, locale) for f in data['filters']],
+    }
+
+
+def encode_prompt_store(prompts):
+    """Encode an {id: prompt} mapping into the prompts.bin format."""
+    ids = sorted(prompts)
+    encoded_ids = [i.encode('utf-8') for i in ids]
+    id_width = max((len(i) for i in encoded_ids), default=0)
+
+    index = bytearray()
+    blob = bytearray()
+    for raw_id, filter_id in zip(encoded_ids, ids):
+        text = prompts[filter_id].encode('utf-8')
+        index += raw_id.ljust(id_width, b'\0')
+        index += ENTRY_TAIL.pack(len(blob), len(text))
+        blob += text
+
+    return HEADER.pack(STORE_MAGIC, STORE_VERSION, id_width, len(ids)) + bytes(index) + bytes(blob)
+
+
+class PromptStore:
+    """Read-only view over prompts.bin; lookups binary-search the fixed-width index."""
+
+    def __init__(self, buf):
+        magic, version, id_width, count = HEADER.unpack_from(buf, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError('not a prompts.bin store (bad magic or version)')
+        self._buf = buf
+        self._id_width = id_width
+        self._count = count
+        self._entry_size = id_width + ENTRY_TAIL.size
+        self._blob_start = HEADER.size + count * self._entry_size
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, i):
+        start = HEADER.size + i * self._entry_size
+        return bytes(self._buf[start:start + self._id_width]).rstrip(b'\0')
+
+    def _entry(self, i):
+        start = HEADER.size + i * self._entry_size + self._id_width
+        return ENTRY_TAIL.unpack_from(self._buf, start)
+
+    def ids(self):
+        return [self._key(i).decode('utf-8') for i in range(self._count)]
+
+    def get(self, filter_id):
+        key = filter_id.encode('utf-8')
+        if len(key) > self._id_width:
+            return None
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count or self._key(lo) != key:
+            return None
+        offset, length = self._entry(lo)
+        start = self._blob_start + offset
+        return bytes(self._buf[start:start + length]).decode('utf-8')
+
+
+def _build_metadata(data, notes):
+    artifacts = {bundle_name(locale): compact_json(build_locale_bundle(data, locale)) for locale in LOCALES}
+    artifacts[SEARCH_INDEX_NAME] = compact_json(SearchIndex.build(data).to_json())
+    return artifacts
+
+
+def _build_prompts(data, notes):
+    prompts = {}
+    for item in data['filters']:
+        if item['id'] in prompts:
+            raise ValueError(f"duplicate filter id {item['id']}")
+        prompts[item['id']] = item['prompt']
+    store = encode_prompt_store(prompts)
+
+    # Round-trip check so a bad store never reaches the server.
+    reader = PromptStore(store)
+    for filter_id, prompt in prompts.items():
+        if reader.get(filter_id) != prompt:
+            raise ValueError(f'prompt store round-trip failed for {filter_id}')
+
+    fragments, stats = compact_prompts(data)
+    if notes is not None:
+        notes.append(f'fragments: {format_stats(stats)}')
+    return {STORE_NAME: store, FRAGMENTS_NAME: compact_json(fragments)}
+
+
+def _build_templates(data, notes):
+    return {TEMPLATES_NAME: compact_json(compile_templates(data))}
+
+
+def _metadata_input(data):
+    filters = [{key: value for key, value in item.items() if key != 'prompt'} for item in data['filters']]
+    return [json.dumps([SEARCH_INDEX_VERSION, data['categories'], data.get('subcategories', []), filters])]
+
+
+def _prompts_input(data):
+    # Raw strings: escaping megabytes of prompt text as JSON would cost more than the hashing.
+    parts = [f'{STORE_VERSION} {FRAGMENTS_VERSION}']
+    for item in data['filters']:
+        parts += (item['id'], item['prompt'])
+    for master in data.get('masterPrompts', []):
+        parts += (master['id'], master['prompt'])
+    return parts
+
+
+def _templates_input(data):
+    return [json.dumps([TEMPLATES_VERSION, data.get('masterPrompts', [])])]
+
+
+# name -> (builder, reader of the catalog slice it uses as a list of strings).
+# A builder returns {filename: bytes}.
+BUILDERS = {
+    'metadata': (_build_metadata, _metadata_input),
+    'prompts': (_build_prompts, _prompts_input),
+    'templates': (_build_templates, _templates_input),
+}
+
+
+def builder_inputs(data):
+    """{builder name: sha256 of the catalog slice it reads}."""
+    inputs = {}
+    for name, (_, read) in BUILDERS.items():
+        parts = read(data)
+        # The lengths come first so the joined strings cannot be split another way.
+        digest = hashlib.sha256(json.dumps([len(part) for part in parts]).encode('utf-8'))
+        digest.update('\0'.join(parts).encode('utf-8', 'surrogatepass'))
+        inputs[name] = digest.hexdigest()
+    return inputs
+
+
+def run_builder(name, data, notes=None):
+    """Return {filename: bytes} for the artifacts of one builder."""
+    return BUILDERS[name][0](data, notes)
+
+
+def build_artifacts(data, notes=None):
+    """Return {filename: bytes} for every artifact derived from the catalog.
+
+    Human-readable build notes (e.g. compaction stats) are appended to ``notes``.
+    """
+    artifacts = {}
+    for name in BUILDERS:
+        artifacts.update(run_builder(name, data, notes))
+    return artifacts
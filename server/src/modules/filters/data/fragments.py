@@ -0,0 +1,179 @@
+"""Shared-fragment compaction of prompt boilerplate (``fragments.json``).
+
+Prompts are cut into sentences (each keeps its trailing whitespace, so
+joining them gives the prompt back byte-for-byte). Sentences that repeat
+across filters and master prompts go into a fragment dictionary. Adjacent
+fragment pairs that keep recurring, like the long PRESERVE block, are then
+merged into one fragment. Each prompt is stored as a list of refs: an int
+indexes ``fragments`` and a str is literal text::
+
+    {"version": 1, "fragments": [...], "filters": {id: [refs]}, "masterPrompts": {id: [refs]}}
+"""
+import heapq
+import re
+from collections import Counter, defaultdict, namedtuple
+
+from streaming import compact_json
+
+FRAGMENTS_NAME = 'fragments.json'
+FRAGMENTS_VERSION = 1
+MIN_FRAGMENT_LENGTH = 24
+MIN_OCCURRENCES = 2
+
+_SENTENCE = re.compile(r'.*?(?:[.!?](?:\s+|$)|$)', re.S)
+
+Stats = namedtuple('Stats', 'prompts original_bytes compacted_bytes fragments refs')
+
+
+def split_sentences(text):
+    return [m.group(0) for m in _SENTENCE.finditer(text) if m.group(0)]
+
+
+def expand(refs, fragments):
+    return ''.join(fragments[r] if isinstance(r, int) else r for r in refs)
+
+
+def _merge_literals(refs):
+    out = []
+    for ref in refs:
+        if isinstance(ref, str) and out and isinstance(out[-1], str):
+            out[-1] += ref
+        else:
+            out.append(ref)
+    return out
+
+
+def _merge_pairs(sequences, fragments):
+    """Repeatedly fuse the most frequent adjacent fragment pair (BPE over sentences).
+
+    All sequences live in one linked list (None separates them). Pair counts
+    are updated as pairs are fused, so a merge costs only its own
+    occurrences, not a rescan of every prompt. Ties go to the smallest (a, b).
+    """
+    flat = []
+    for seq in sequences:
+        flat.extend(seq)
+        flat.append(None)
+    end = len(flat)
+    nxt = list(range(1, end + 1))
+    prv = list(range(-1, end - 1))
+
+    counts = Counter()
+    # Left positions of each pair. Never pruned: entries are checked when used.
+    where = defaultdict(list)
+    for i in range(end - 1):
+        a, b = flat[i], flat[i + 1]
+        if type(a) is int and type(b) is int:
+            counts[a, b] += 1
+            where[a, b].append(i)
+
+    heap = [(-count, a, b) for (a, b), count in counts.items()]
+    heapq.heapify(heap)
+    while heap:
+        neg, a, b = heapq.heappop(heap)
+        if counts.get((a, b)) != -neg:
+            continue  # stale heap entry
+        if -neg < MIN_OCCURRENCES:
+            break
+        fragments.append(fragments[a] + fragments[b])
+        merged = len(fragments) - 1
+        touched = set()
+        for i in sorted(where.pop((a, b))):
+            j = nxt[i]
+            # Already fused into another pair (or an overlapping a == b occurrence).
+            if flat[i] != a or j >= end or flat[j] != b:
+                continue
+            p, k = prv[i], nxt[j]
+            left = flat[p] if p >= 0 else None
+            right = flat[k] if k < end else None
+            flat[i], flat[j] = merged, None
+            nxt[i] = k
+            if k < end:
+                prv[k] = i
+            if type(left) is int:
+                counts[left, a] -= 1
+                counts[left, merged] += 1
+                where[left, merged].append(p)
+                touched.update(((left, a), (left, merged)))
+            if type(right) is int:
+                counts[b, right] -= 1
+                counts[merged, right] += 1
+                where[merged, right].append(i)
+                touched.update(((b, right), (merged, right)))
+        del counts[a, b]
+        touched.discard((a, b))
+        for pair in touched:
+            if counts[pair] > 0:
+                heapq.heappush(heap, (-counts[pair], *pair))
+
+    i = 0
+    for seq in sequences:
+        live = []
+        while flat[i] is not None:
+            live.append(flat[i])
+            i = nxt[i]
+        seq[:] = live
+        i = nxt[i]
+
+
+def _renumber(sequences, fragments):
+    """Drop fragments no prompt references any more; number the rest by first use."""
+    order = {}
+    for seq in sequences:
+        for ref in seq:
+            if isinstance(ref, int) and ref not in order:
+                order[ref] = len(order)
+    for seq in sequences:
+        seq[:] = [order[r] if isinstance(r, int) else r for r in seq]
+    return [fragments[old] for old, _ in sorted(order.items(), key=lambda kv: kv[1])]
+
+
+def compact_prompts(data, min_length=MIN_FRAGMENT_LENGTH):
+    """Build the fragments document for every filter and master prompt. Returns (doc, Stats)."""
+    sources = [('filters', f['id'], f['prompt']) for f in data['filters']]
+    sources += [('masterPrompts', m['id'], m['prompt']) for m in data.get('masterPrompts', [])]
+
+    split = [split_sentences(prompt) for _, _, prompt in sources]
+    counts = Counter(s for sentences in split for s in sentences)
+
+    fragments = []
+    index = {}
+    sequences = []
+    for sentences in split:
+        seq = []
+        for sentence in sentences:
+            if counts[sentence] >= MIN_OCCURRENCES and len(sentence) >= min_length:
+                if sentence not in index:
+                    index[sentence] = len(fragments)
+                    fragments.append(sentence)
+                seq.append(index[sentence])
+            else:
+                seq.append(sentence)
+        sequences.append(seq)
+
+    _merge_pairs(sequences, fragments)
+    fragments = _renumber(sequences, fragments)
+
+    doc = {'version': FRAGMENTS_VERSION, 'fragments': fragments, 'filters': {}, 'masterPrompts': {}}
+    for (section, entry_id, prompt), seq in zip(sources, sequences):
+        refs = _merge_literals(seq)
+        if expand(refs, fragments) != prompt:
+            raise ValueError(f'fragment round-trip failed for {entry_id}')
+        doc[section][entry_id] = refs
+
+    original = sum(len(prompt.encode('utf-8')) for _, _, prompt in sources)
+    stats = Stats(
+        prompts=len(sources),
+        original_bytes=original,
+        compacted_bytes=len(compact_json(doc)),
+        fragments=len(fragments),
+        refs=sum(1 for seq in sequences for r in seq if isinstance(r, int)),
+    )
+    return doc, stats
+
+
+def format_stats(stats):
+    saved = 1 - stats.compacted_bytes / stats.original_bytes if stats.original_bytes else 0.0
+    return (f'{stats.prompts} prompts, {stats.original_bytes} bytes of prompt text -> '
+            f'{stats.compacted_bytes} bytes ({saved:.1%} smaller), '
+            f'{stats.fragments} shared fragments, {stats.refs} refs')
@@ -0,0 +1,253 @@
+"""Batch machine translation for strings the maps/TM could not resolve.
+
+Targets are collected across filters, categories/subcategories and
+master-prompt variable options, deduplicated by source text, and sent to a
+pluggable translator in size-bounded batches with bounded concurrency.
+Rate-limited batches are retried with exponential backoff. Every finished
+batch is appended to a JSONL checkpoint tagged with the backend that
+produced it, so an interrupted run resumes where it stopped. Rows from a
+different backend are ignored. Once a run finishes without failed batches
+the checkpoint is cut down to the sources the backend kept in Latin script
+(brand names like "Clean Girl"), or deleted if there are none. Those
+strings still look untranslated in the catalog, so they come back as
+targets every run; their rows answer them without another backend call.
+
+A translator is any object with::
+
+    max_batch_items: int
+    max_batch_chars: int
+    async def translate(self, texts: list[str], target: str) -> list[str]
+
+raising ``RateLimitError`` when the backend asks us to slow down. An optional
+``name`` identifies it in the checkpoint (default: its class path).
+``StubTranslator`` is a test double only; ``load_translator`` does not offer it.
+"""
+import asyncio
+import importlib
+import json
+import random
+from collections import namedtuple
+
+from streaming import atomic_writer
+
+TARGET_LOCALES = ('ka', 'ru')
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+# container[ka_field]/container[ru_field] receive the translations of `source`.
+Target = namedtuple('Target', 'kind container ka_field ru_field source')
+
+
+class RateLimitError(Exception):
+    def __init__(self, message='rate limited', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+STUB_TAGS = {'ka': 'ქა', 'ru': 'ру'}
+
+
+class StubTranslator:
+    """Offline test double: tags text with the target locale, optionally rate-limiting every Nth call.
+
+    Its output is not a translation, so it is deliberately not reachable from
+    ``--mt``: written back, the Georgian-script tag would mark entries as done.
+    """
+
+    name = 'stub'
+    max_batch_items = 50
+    max_batch_chars = 4000
+
+    def __init__(self, rate_limit_every=0):
+        self.rate_limit_every = rate_limit_every
+        self.calls = 0
+        self.sent = []
+
+    async def translate(self, texts, target):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0)
+        if self.rate_limit_every and call % self.rate_limit_every == 0:
+            raise RateLimitError(retry_after=0)
+        self.sent.append((target, list(texts)))
+        return [f'[{STUB_TAGS.get(target, target)}] {text}' for text in texts]
+
+
+def load_translator(spec):
+    """'package.module:factory' (called with no arguments)."""
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"translator spec must be 'module:factory', got {spec!r}")
+    translator = getattr(importlib.import_module(module_name), attr)()
+    if isinstance(translator, StubTranslator):
+        raise ValueError('StubTranslator is a test double; its output must not reach the catalog')
+    return translator
+
+
+def backend_name(translator):
+    cls = type(translator)
+    return getattr(translator, 'name', None) or f'{cls.__module__}.{cls.__qualname__}'
+
+
+def is_georgian(text):
+    return any('\u10a0' <= ch <= '\u10ff' or '\u1c90' <= ch <= '\u1cbf' for ch in text)
+
+
+def _needs_label(container):
+    label_ka = container.get('label_ka')
+    return not label_ka or (label_ka == container.get('label_en') and not is_georgian(label_ka))
+
+
+def collect_targets(data, pending_filter_fields):
+    """Targets for pending filter fields plus every untranslated category/option label.
+
+    ``pending_filter_fields`` is a list of (filter, 'name'|'description') pairs
+    whose ``*_ka`` field still holds source text.
+    """
+    targets = []
+    for item, field in pending_filter_fields:
+        targets.append(Target(field, item, f'{field}_ka', f'{field}_ru', item[f'{field}_ka']))
+    for category in data.get('categories', []) + data.get('subcategories', []):
+        if category.get('label_en') and _needs_label(category):
+            targets.append(Target('label', category, 'label_ka', 'label_ru', category['label_en']))
+    for master in data.get('masterPrompts', []):
+        for variable in master.get('variables', []):
+            for option in variable.get('options', []):
+                if option.get('label_en') and _needs_label(option):
+                    targets.append(Target('label', option, 'label_ka', 'label_ru', option['label_en']))
+    return targets
+
+
+def make_batches(texts, max_items, max_chars):
+    batch, size = [], 0
+    for text in texts:
+        if batch and (len(batch) >= max_items or size + len(text) > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(text)
+        size += len(text)
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path, backend):
+    """{(source, locale): text} from rows ``backend`` wrote; other backends' rows are ignored."""
+    done = {}
+    if path is None or not path.exists():
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if row.get('backend') == backend:
+                done[(row['source'], row['locale'])] = row['text']
+    return done
+
+
+def _checkpoint_row(backend, source, locale, text):
+    return json.dumps({'backend': backend, 'source': source, 'locale': locale, 'text': text},
+                      ensure_ascii=False) + '\n'
+
+
+def _keep_latin_rows(path, backend, done):
+    """After a clean run, keep only the rows of sources whose Georgian output is not in Georgian script."""
+    kept = sorted(source for (source, locale), text in done.items() if locale == 'ka' and not is_georgian(text))
+    if not kept:
+        path.unlink(missing_ok=True)
+        return
+    with atomic_writer(path) as f:
+        for source in kept:
+            for locale in TARGET_LOCALES:
+                if (source, locale) in done:
+                    f.write(_checkpoint_row(backend, source, locale, done[(source, locale)]).encode('utf-8'))
+
+
+async def _translate_batch(translator, batch, locale, semaphore, max_retries):
+    attempt = 0
+    while True:
+        async with semaphore:
+            try:
+                result = await translator.translate(batch, locale)
+            except RateLimitError as err:
+                if attempt >= max_retries:
+                    raise
+                delay = err.retry_after
+            else:
+                if len(result) != len(batch):
+                    raise ValueError(f'translator returned {len(result)} results for {len(batch)} texts')
+                return result
+        if delay is None:
+            delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt) * random.uniform(0.5, 1.0)
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def translate_all(translator, sources, checkpoint_path=None,
+                        concurrency=DEFAULT_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES):
+    """Translate unique sources into every target locale.
+
+    Returns ({(source, locale): text}, [errors]). Batches that fail are
+    reported and left untranslated; everything else is checkpointed. With no
+    errors only the Latin-script answers are kept in the checkpoint.
+    """
+    backend = backend_name(translator)
+    done = load_checkpoint(checkpoint_path, backend)
+    semaphore = asyncio.Semaphore(concurrency)
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+
+    async def run(batch, locale):
+        result = await _translate_batch(translator, batch, locale, semaphore, max_retries)
+        for source, text in zip(batch, result):
+            done[(source, locale)] = text
+            if checkpoint:
+                checkpoint.write(_checkpoint_row(backend, source, locale, text))
+        if checkpoint:
+            checkpoint.flush()
+
+    jobs = []
+    for locale in TARGET_LOCALES:
+        todo = [s for s in sources if (s, locale) not in done]
+        for batch in make_batches(todo, translator.max_batch_items, translator.max_batch_chars):
+            jobs.append(run(batch, locale))
+
+    try:
+        outcomes = await asyncio.gather(*jobs, return_exceptions=True)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if checkpoint and not errors:
+        _keep_latin_rows(checkpoint_path, backend, done)
+    return done, errors
+
+
+def apply_translations(targets, translations):
+    """Write translations back into their containers. Returns the targets that changed."""
+    changed = []
+    for target in targets:
+        ka = translations.get((target.source, 'ka'))
+        ru = translations.get((target.source, 'ru'))
+        if ka is None or ru is None:
+            continue
+        if target.container.get(target.ka_field) != ka or target.container.get(target.ru_field) != ru:
+            target.container[target.ka_field] = ka
+            target.container[target.ru_field] = ru
+            changed.append(target)
+    return changed
+
+
+def machine_translate(data, pending_filter_fields, translator, checkpoint_path=None,
+                      concurrency=DEFAULT_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES):
+    """Run the whole stage in place. Returns (changed targets, translations, errors)."""
+    targets = collect_targets(data, pending_filter_fields)
+    sources = list(dict.fromkeys(t.source for t in targets))
+    if not sources:
+        return [], {}, []
+    translations, errors = asyncio.run(
+        translate_all(translator, sources, checkpoint_path, concurrency, max_retries))
+    return apply_translations(targets, translations), translations, errors
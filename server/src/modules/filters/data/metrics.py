@@ -0,0 +1,85 @@
+"""Structured per-run metrics for translate.py (``--metrics``).
+
+One JSON object per run, appended as a line to the metrics file::
+
+    {"run": "20261018T120000.123456Z", "mode": "incremental", "ok": true, "seconds": 0.041,
+     "stages": {"load": 0.002, "lookup": 0.001, "translate": 0.0, "write": 0.003, "build": 0.03},
+     "entries": {"total": 97, "checked": 2, "translated": 1, "untranslated": 0},
+     "lookups": {"hits": 2, "misses": 0, "fuzzy": 0},
+     "written": {"prompts.json": 153402, "catalog.ka.json": 31877}, "bytes_written": 185279,
+     "digests": {"prompts.json": "9f2c..."}}
+
+Stage timings are wall seconds and add up when a stage runs more than once.
+``written`` only lists files whose bytes actually changed on disk.
+``digests`` holds the sha256 of the catalog this run built from (or wrote),
+and of the translation memory it left behind. watch.py compares these with
+the files on disk, so an edit made while the run was in flight is not
+mistaken for the run's own output.
+"""
+import contextlib
+import json
+import time
+from datetime import datetime, timezone
+
+
+class RunMetrics:
+    def __init__(self, mode):
+        self.run = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ')
+        self.mode = mode
+        self.ok = False
+        self.stages = {}
+        self.entries = {}
+        self.lookups = {'hits': 0, 'misses': 0, 'fuzzy': 0}
+        self.written = {}
+        self.digests = {}
+        self._started = time.perf_counter()
+        self._seconds = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, key, n=1):
+        self.entries[key] = self.entries.get(key, 0) + n
+
+    def wrote(self, path, nbytes):
+        self.written[path.name] = self.written.get(path.name, 0) + nbytes
+
+    def produced(self, path, sha256):
+        self.digests[path.name] = sha256
+
+    def finish(self, ok=True):
+        self.ok = ok
+        self._seconds = time.perf_counter() - self._started
+
+    def to_json(self):
+        seconds = self._seconds if self._seconds is not None else time.perf_counter() - self._started
+        return {
+            'run': self.run,
+            'mode': self.mode,
+            'ok': self.ok,
+            'seconds': round(seconds, 4),
+            'stages': {name: round(elapsed, 4) for name, elapsed in self.stages.items()},
+            'entries': self.entries,
+            'lookups': self.lookups,
+            'written': self.written,
+            'bytes_written': sum(self.written.values()),
+            'digests': self.digests,
+        }
+
+    def append_to(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_json(), ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def format_metrics(record):
+    stages = ', '.join(f'{name} {elapsed * 1000:.1f}ms' for name, elapsed in record['stages'].items())
+    lookups = record['lookups']
+    return (f"{'ok' if record['ok'] else 'FAILED'} in {record['seconds'] * 1000:.1f}ms ({stages}); "
+            f"{record['entries'].get('total', 0)} filters, {record['entries'].get('translated', 0)} translated; "
+            f"lookups {lookups['hits']} hit / {lookups['misses']} miss; "
+            f"{record['bytes_written']} bytes written")
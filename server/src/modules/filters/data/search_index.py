@@ -0,0 +1,382 @@
+"""Prebuilt multilingual search index over the filter catalog (``search-index.json``).
+
+Each filter is one document. Its fields are the name, the description and
+the category label, each in ka/ru/en. Text is normalized as follows:
+
+* NFKC and casefolding. This also folds Georgian Mtavruli capitals to Mkhedruli.
+* ``ё`` becomes ``е``.
+* Latin diacritics are stripped. Cyrillic ``й`` is left alone.
+
+Tokens go into a sorted vocabulary with postings, so exact and prefix
+matches are a bisect away. A query token that matches no word start falls
+back to the words containing it (found through a trigram index over the
+vocabulary), and then to its stem (last letter dropped) to tolerate
+inflected endings. Every query token must match. A document's score is
+the sum over tokens of its best field weight times the match factor,
+boosted for ``isPopular``.
+
+Queries are answered impact-first. When loaded, each token's postings
+are grouped by (field, popular). A query walks the groups of its cheapest
+token in descending score bound and checks every other token against the
+candidate's own sorted token list. It stops as soon as the top ``limit``
+cannot change, so broad prefixes and catalog-wide words do not cost a
+pass over every match. When the other tokens' bounds are too loose for
+that to happen early, the query instead intersects per-score doc sets of
+its cheapest tokens and only checks the rest on the surviving candidates.
+
+Serialized form::
+
+    {"version": 2, "fields": [[locale, field], ...], "ids": [...], "popular": [0|1, ...],
+     "vocab": [token, ...], "postings": [[doc << 4 | field, ...], ...],
+     "trigrams": {gram: [vocab index, ...]}}
+"""
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from pathlib import Path
+
+SEARCH_INDEX_NAME = 'search-index.json'
+SEARCH_INDEX_VERSION = 2
+
+LOCALES = ('ka', 'ru', 'en')
+FIELDS = tuple((locale, field) for locale in LOCALES for field in ('name', 'description', 'category'))
+FIELD_WEIGHTS = {'name': 3.0, 'description': 1.5, 'category': 1.0}
+FIELD_BITS = 4
+FIELD_MASK = (1 << FIELD_BITS) - 1
+PREFIX_FACTOR = 0.6
+SUBSTRING_FACTOR = 0.3
+STEM_FACTOR = 0.4
+POPULAR_BOOST = 1.25
+# Docs a multi-token query may score walking impact groups before it
+# switches to intersecting doc sets.
+WALK_BUDGET = 64
+# Collect a token as doc sets while it has at most this many postings per
+# remaining candidate; past that, checking each candidate is cheaper.
+SET_RATIO = 32
+# Last code point: every token starting with a prefix sorts below prefix + this.
+_MAX_CHAR = '\U0010ffff'
+
+_TOKEN = re.compile(r'\w+')
+
+# How one query token matches: vocab[start:stop] (or the vocab indices in
+# ``ids``), scoring ``exact_factor`` on vocab[exact] and ``factor`` elsewhere.
+# ``cost`` is the postings behind it and ``bound`` its best possible score.
+Matcher = namedtuple('Matcher', 'start stop ids exact exact_factor factor cost bound')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е')
+    out = []
+    for ch in unicodedata.normalize('NFD', text):
+        if unicodedata.combining(ch) and out and out[-1] < 'ɐ':
+            continue  # accent on a Latin letter
+        out.append(ch)
+    return unicodedata.normalize('NFC', ''.join(out))
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text))
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, ids, popular, vocab, postings, grams):
+        self.ids = ids
+        self.popular = popular
+        self.vocab = vocab
+        self.postings = postings
+        self.grams = grams
+        self._token_index = {token: i for i, token in enumerate(vocab)}
+        self._weights = [FIELD_WEIGHTS[field] for _, field in FIELDS]
+        # _impact[token] = [(field, popular, [doc, ...]), ...]; _forward[doc] = sorted [token << 4 | field].
+        self._impact = []
+        self._forward = [[] for _ in ids]
+        for token, token_postings in enumerate(postings):
+            groups = {}
+            for posting in token_postings:
+                doc, field = posting >> FIELD_BITS, posting & FIELD_MASK
+                groups.setdefault((field, popular[doc]), []).append(doc)
+                self._forward[doc].append(token << FIELD_BITS | field)
+            self._impact.append([(field, pop, docs) for (field, pop), docs in groups.items()])
+        self._popular_docs = {doc for doc, flag in enumerate(popular) if flag}
+        # Per locale (None: all of them): _costs[locale][i] = postings of vocab[:i], so a prefix's
+        # cost is one subtraction, and _best[locale][i] = vocab[i]'s best field weight.
+        self._costs, self._best = {}, {}
+        for locale in (None, *LOCALES):
+            counts, best = [], []
+            for groups in self._impact:
+                in_locale = [(field, docs) for field, _, docs in groups if locale in (None, FIELDS[field][0])]
+                counts.append(sum(len(docs) for _, docs in in_locale))
+                best.append(max((self._weights[field] for field, _ in in_locale), default=0.0))
+            self._costs[locale] = [0, *itertools.accumulate(counts)]
+            self._best[locale] = best
+
+    @classmethod
+    def build(cls, data):
+        labels = {c['id']: c for c in data.get('categories', []) + data.get('subcategories', [])}
+        ids, popular = [], []
+        token_docs = {}
+
+        for doc, item in enumerate(data['filters']):
+            ids.append(item['id'])
+            popular.append(1 if item.get('isPopular') else 0)
+            category = labels.get(item.get('subcategoryId')) or labels.get(item.get('categoryId')) or {}
+            for field_id, (locale, field) in enumerate(FIELDS):
+                if field == 'category':
+                    raw = category.get(f'label_{locale}', '')
+                else:
+                    raw = item.get(f'{field}_{locale}', '')
+                for token in tokenize(raw or ''):
+                    token_docs.setdefault(token, set()).add(doc << FIELD_BITS | field_id)
+
+        vocab = sorted(token_docs)
+        postings = [sorted(token_docs[token]) for token in vocab]
+        grams = {}
+        for i, token in enumerate(vocab):
+            for gram in trigrams(token):
+                grams.setdefault(gram, []).append(i)
+        return cls(ids, popular, vocab, postings, dict(sorted(grams.items())))
+
+    def to_json(self):
+        return {
+            'version': SEARCH_INDEX_VERSION,
+            'fields': [list(f) for f in FIELDS],
+            'ids': self.ids,
+            'popular': self.popular,
+            'vocab': self.vocab,
+            'postings': self.postings,
+            'trigrams': self.grams,
+        }
+
+    @classmethod
+    def from_json(cls, doc):
+        if doc.get('version') != SEARCH_INDEX_VERSION or [tuple(f) for f in doc['fields']] != list(FIELDS):
+            raise ValueError('search index was built by an incompatible version')
+        return cls(doc['ids'], doc['popular'], doc['vocab'], doc['postings'], doc['trigrams'])
+
+    def _prefix_range(self, prefix):
+        start = bisect.bisect_left(self.vocab, prefix)
+        return start, bisect.bisect_left(self.vocab, prefix + _MAX_CHAR, start)
+
+    def _prefix_cost(self, prefix):
+        """Postings a full expansion of ``prefix`` would touch."""
+        start, stop = self._prefix_range(prefix)
+        return self._costs[None][stop] - self._costs[None][start]
+
+    def _substring_ids(self, token):
+        """Vocab indices of the words containing ``token``."""
+        candidates = None
+        for gram in trigrams(token):
+            ids = self.grams.get(gram)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if token in self.vocab[i])
+
+    def _make_matcher(self, start, stop, ids, exact, exact_factor, factor, locale):
+        """A Matcher, or None if nothing in ``locale`` matches."""
+        costs, best = self._costs[locale], self._best[locale]
+        if ids is None:
+            cost = costs[stop] - costs[start]
+            bound = max(best[start:stop], default=0.0) * factor
+        else:
+            cost = sum(costs[i + 1] - costs[i] for i in ids)
+            bound = max((best[i] for i in ids), default=0.0) * factor
+        if exact is not None:
+            bound = max(bound, best[exact] * exact_factor)
+        return Matcher(start, stop, ids, exact, exact_factor, factor, cost, bound) if cost else None
+
+    def _matcher(self, token, locale):
+        """Exact/prefix, then substring, then stem: the first that matches anything."""
+        start, stop = self._prefix_range(token)
+        matcher = self._make_matcher(start, stop, None, self._token_index.get(token), 1.0, PREFIX_FACTOR, locale)
+        if matcher is None and len(token) >= 3:
+            ids = self._substring_ids(token)
+            matcher = self._make_matcher(0, 0, ids, None, SUBSTRING_FACTOR, SUBSTRING_FACTOR, locale)
+        # Inflected endings ("роза" vs "розы", "ვარდი" vs "ვარდის"): retry on the stem.
+        if matcher is None and len(token) >= 4:
+            start, stop = self._prefix_range(token[:-1])
+            matcher = self._make_matcher(start, stop, None, None, STEM_FACTOR, STEM_FACTOR, locale)
+        return matcher
+
+    def _token_score(self, doc, matcher, allowed):
+        """Best weighted match of one query token in one document (0.0 if none)."""
+        codes = self._forward[doc]
+        if matcher.ids is None:
+            lo = bisect.bisect_left(codes, matcher.start << FIELD_BITS)
+            codes = codes[lo:bisect.bisect_left(codes, matcher.stop << FIELD_BITS, lo)]
+        else:
+            codes = [code for code in codes if code >> FIELD_BITS in matcher.ids]
+        best = 0.0
+        for code in codes:
+            field = code & FIELD_MASK
+            if allowed[field]:
+                factor = matcher.exact_factor if code >> FIELD_BITS == matcher.exact else matcher.factor
+                best = max(best, self._weights[field] * factor)
+        return best
+
+    def _level_sets(self, matcher, allowed):
+        """[(score, docs)] best first: each doc under the best score ``matcher`` gives it."""
+        by_level = defaultdict(list)
+        for i in range(matcher.start, matcher.stop) if matcher.ids is None else matcher.ids:
+            factor = matcher.exact_factor if i == matcher.exact else matcher.factor
+            for field, _, docs in self._impact[i]:
+                if allowed[field]:
+                    by_level[self._weights[field] * factor].append(docs)
+        levels, covered = [], set()
+        for level in sorted(by_level, reverse=True):
+            docs = set().union(*by_level[level])
+            if covered:
+                docs -= covered
+            if docs:
+                levels.append((level, docs))
+                covered |= docs
+        return levels
+
+    def search(self, query, limit=20, locale=None):
+        """Return [(filter id, score)] for docs matching every query token, best first."""
+        tokens = sorted(dict.fromkeys(tokenize(query)), key=self._prefix_cost)
+        if not tokens or limit <= 0:
+            return []
+        allowed = [locale is None or field_locale == locale for field_locale, _ in FIELDS]
+        matchers = []
+        for token in tokens:
+            matcher = self._matcher(token, locale)
+            if matcher is None:
+                return []
+            matchers.append(matcher)
+        top = self._walk(matchers, limit, allowed, None if len(matchers) == 1 else WALK_BUDGET)
+        if top is None:
+            top = self._intersect(matchers, limit, allowed)
+        return [(self.ids[-neg_doc], round(score, 4)) for score, neg_doc in sorted(top, reverse=True)]
+
+    def _walk(self, matchers, limit, allowed, budget):
+        """Top ``limit`` as a min-heap of (score, -doc), walking the cheapest token's groups best first.
+
+        Returns None once more than ``budget`` docs were scored: the other
+        tokens' bounds were too loose for the walk to stop early.
+        """
+        driver = min(matchers, key=lambda m: m.cost)
+        by_level = defaultdict(list)
+        for i in range(driver.start, driver.stop) if driver.ids is None else driver.ids:
+            factor = driver.exact_factor if i == driver.exact else driver.factor
+            for field, popular, docs in self._impact[i]:
+                if allowed[field]:
+                    by_level[self._weights[field] * factor, popular].append(docs)
+        groups = defaultdict(list)
+        for (level, popular), lists in by_level.items():
+            bound = self._sum(level if m is driver else m.bound for m in matchers)
+            groups[bound * (POPULAR_BOOST if popular else 1.0)].extend(lists)
+
+        top = []
+        seen = set()
+        for bound in sorted(groups, reverse=True):
+            lists = groups[bound]
+            for doc in lists[0] if len(lists) == 1 else heapq.merge(*lists):
+                if doc in seen:
+                    continue
+                # Docs come in id order and score at most `bound`: once last place
+                # beats (bound, doc), nothing left in this or any later group can.
+                if len(top) == limit and top[0] > (bound, -doc):
+                    return top
+                if budget is not None and len(seen) >= budget:
+                    return None
+                seen.add(doc)
+                self._offer(top, limit, doc, matchers, allowed)
+        return top
+
+    def _intersect(self, matchers, limit, allowed):
+        """Top ``limit`` by intersecting doc sets split by score, cheapest tokens first.
+
+        A token is only collected as sets while that is cheaper than checking
+        it on each remaining candidate. The candidates end up in parts whose
+        score is known, or bounded by the tokens left to check per doc.
+        """
+        parts = None  # [({matcher position: score}, docs)]
+        for pos in sorted(range(len(matchers)), key=lambda p: matchers[p].cost):
+            if parts is not None and matchers[pos].cost > SET_RATIO * sum(len(docs) for _, docs in parts):
+                break
+            levels = self._level_sets(matchers[pos], allowed)
+            if parts is None:
+                parts = [({pos: level}, docs) for level, docs in levels]
+            else:
+                parts = [({**known, pos: level}, docs & level_docs)
+                         for known, docs in parts for level, level_docs in levels if not docs.isdisjoint(level_docs)]
+        rest = [m for pos, m in enumerate(matchers) if pos not in parts[0][0]] if parts else []
+
+        groups = defaultdict(set)
+        for known, docs in parts:
+            score = self._sum(known.get(pos, m.bound) for pos, m in enumerate(matchers))
+            popular = docs & self._popular_docs
+            if popular:
+                groups[score * POPULAR_BOOST] |= popular
+            if len(popular) < len(docs):
+                groups[score] |= docs - popular
+
+        top = []
+        for bound in sorted(groups, reverse=True):
+            for doc in sorted(groups[bound]):
+                if len(top) == limit and top[0] > (bound, -doc):
+                    return top
+                if rest:
+                    self._offer(top, limit, doc, matchers, allowed)
+                elif len(top) < limit:
+                    heapq.heappush(top, (bound, -doc))
+                else:
+                    heapq.heapreplace(top, (bound, -doc))
+        return top
+
+    def _offer(self, top, limit, doc, matchers, allowed):
+        """Score ``doc`` on every token and keep it if it makes the top ``limit``."""
+        scores = []
+        for matcher in matchers:
+            score = self._token_score(doc, matcher, allowed)
+            if not score:
+                return
+            scores.append(score)
+        entry = (self._sum(scores) * (POPULAR_BOOST if self.popular[doc] else 1.0), -doc)
+        if len(top) < limit:
+            heapq.heappush(top, entry)
+        elif entry > top[0]:
+            heapq.heapreplace(top, entry)
+
+    @staticmethod
+    def _sum(values):
+        """Left-to-right float sum; bounds and scores add in the same order, so a bound is never rounded below."""
+        total = None
+        for value in values:
+            total = value if total is None else total + value
+        return total
+
+
+
+def main(argv=None):
+    data_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description='Query the filter search index.')
+    parser.add_argument('query')
+    parser.add_argument('--locale', choices=LOCALES, default=None)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--index', type=Path, default=data_dir / SEARCH_INDEX_NAME,
+                        help='prebuilt index (built from prompts.json if missing)')
+    args = parser.parse_args(argv)
+
+    if args.index.exists():
+        index = SearchIndex.from_json(json.loads(args.index.read_text(encoding='utf-8')))
+    else:
+        index = SearchIndex.build(json.loads((data_dir / 'prompts.json').read_text(encoding='utf-8')))
+    for filter_id, score in index.search(args.query, args.limit, args.locale):
+        print(f'{score:>7.3f}  {filter_id}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Memory-bounded streaming over prompts.json.
+
+The top-level object is read member by member. ``filters`` is parsed one item
+at a time and pushed through a chain of generator stages. The result is
+written to a temp file next to the target and renamed over it atomically.
+Output is byte-identical to ``json.dumps(data, indent=2, ensure_ascii=False)``
+plus a trailing newline, so memory stays flat however long ``filters`` gets.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+CHUNK_SIZE = 1 << 16
+INDENT = '  '
+STREAMED_KEY = 'filters'
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class _Unchanged(Exception):
+    """Raised inside the atomic writer to discard output identical to the target."""
+
+
+@contextlib.contextmanager
+def atomic_writer(path):
+    """Binary writer to a temp file in path's directory; renamed over path only on success."""
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, _target_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def compact_json(value):
+    """UTF-8 JSON with no insignificant whitespace: the encoding every build artifact uses."""
+    return (json.dumps(value, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _target_mode(path):
+    """Keep the target's permissions; new files get the usual 0o666 & ~umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class _Reader:
+    def __init__(self, f):
+        self._f = f
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._f.read(CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > CHUNK_SIZE:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'expected {char!r} in catalog, found {found or "EOF"!r}')
+        self._pos += 1
+
+    def _only_number_chars_from(self, pos):
+        while pos < len(self._buf):
+            if self._buf[pos] not in _NUMBER_CHARS:
+                return False
+            pos += 1
+        return True
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # raw_decode stops a number at the buffer edge ("1." parses as 1), so if
+            # only number characters follow, the rest may still be in the next chunk.
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and self._only_number_chars_from(end) and self._fill()):
+                continue
+            self._pos = end
+            return value
+
+
+def iter_members(reader):
+    """Yield (key, reader) for each member of the top-level object; the caller consumes the value."""
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        yield key, reader
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect('}')
+        return
+
+
+def iter_array(reader):
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.expect(']')
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect(']')
+        return
+
+
+def _dumps(value, level):
+    return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + INDENT * level)
+
+
+def pipeline(items, stages):
+    for stage in stages:
+        items = stage(items)
+    return items
+
+
+def stream_catalog(src_path, dst_path, stages):
+    """Stream src through ``stages`` (callables mapping an iterator of filters to another).
+
+    Returns (wrote, filters_seen, sha256 hex digest of the output). When the
+    output is byte-identical to what is already at dst_path the temp file is
+    discarded and dst is left alone.
+    """
+    existing = hashlib.sha256()
+    try:
+        with open(dst_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                existing.update(chunk)
+        existing_digest = existing.hexdigest()
+    except FileNotFoundError:
+        existing_digest = None
+
+    produced = hashlib.sha256()
+    seen = 0
+
+    def emit(out, text):
+        data = text.encode('utf-8')
+        produced.update(data)
+        out.write(data)
+
+    try:
+        with open(src_path, encoding='utf-8') as src, atomic_writer(dst_path) as out:
+            reader = _Reader(src)
+            first = True
+            emit(out, '{')
+            for key, _ in iter_members(reader):
+                emit(out, ('\n' if first else ',\n') + INDENT + json.dumps(key, ensure_ascii=False) + ': ')
+                first = False
+                if key == STREAMED_KEY and reader.peek() == '[':
+                    count = 0
+                    for item in pipeline(iter_array(reader), stages):
+                        emit(out, ('[\n' if count == 0 else ',\n') + INDENT * 2 + _dumps(item, 2))
+                        count += 1
+                    emit(out, '\n' + INDENT + ']' if count else '[]')
+                    seen += count
+                else:
+                    emit(out, _dumps(reader.value(), 1))
+            emit(out, '\n}\n' if not first else '}\n')
+            if reader.peek():
+                raise ValueError('trailing data after catalog object')
+            if produced.hexdigest() == existing_digest:
+                raise _Unchanged()
+    except _Unchanged:
+        return False, seen, existing_digest
+    return True, seen, produced.hexdigest()
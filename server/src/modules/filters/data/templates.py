@@ -0,0 +1,166 @@
+"""Precompiled master-prompt templates (``templates.json``).
+
+Each master prompt is split into literal segments around its ``[variable id]``
+slots (``segments`` always has one more entry than ``slots``), every variable's
+options become an id -> value table, and the prompt resolved with defaults is
+stored as ``defaultPrompt``. Resolving a request is then a single pass::
+
+    segments[0] + value(slots[0]) + segments[1] + ... + segments[-1]
+
+Slots are found by searching for each declared id literally, as
+filtersService.resolvePrompt does, so any id works (``[hair-color]``,
+``[Extras]``). ``resolve`` gives the same result as resolvePrompt. When a
+value could change what a later String.replace sees (it contains ``[`` or a
+``$`` replacement pattern), it falls back to the sequential replace, which
+is also what the compiled default prompt is checked against.
+"""
+import re
+
+TEMPLATES_NAME = 'templates.json'
+TEMPLATES_VERSION = 1
+# Bracketed upper-case tokens that look like placeholders; undeclared ones are reported as typos.
+PLACEHOLDER = re.compile(r'\[([A-Z][A-Z0-9_]*)\]')
+# Special sequences in a String.prototype.replace replacement string.
+_JS_REPLACEMENT = re.compile(r"\$[$&`']")
+
+
+class TemplateError(ValueError):
+    def __init__(self, problems):
+        super().__init__('invalid master prompt templates:\n  ' + '\n  '.join(problems))
+        self.problems = problems
+
+
+def validate_master_prompt(master):
+    """Return a list of problems; empty if the template compiles cleanly."""
+    problems = []
+    mp_id = master.get('id')
+    prompt = master['prompt']
+    variable_ids = [v['id'] for v in master.get('variables', [])]
+
+    for var_id in sorted({v for v in variable_ids if variable_ids.count(v) > 1}):
+        problems.append(f'{mp_id}: variable {var_id} is declared more than once')
+    for var_id in sorted(set(PLACEHOLDER.findall(prompt)) - set(variable_ids)):
+        problems.append(f'{mp_id}: placeholder [{var_id}] has no matching variable')
+    for var_id in variable_ids:
+        count = prompt.count(f'[{var_id}]')
+        if not count:
+            problems.append(f'{mp_id}: variable {var_id} has no [{var_id}] placeholder')
+        elif count > 1:
+            # resolvePrompt uses String.replace, which only fills the first one.
+            problems.append(f'{mp_id}: placeholder [{var_id}] appears {count} times')
+
+    for variable in master.get('variables', []):
+        option_ids = [o['id'] for o in variable['options']]
+        for opt_id in sorted({o for o in option_ids if option_ids.count(o) > 1}):
+            problems.append(f"{mp_id}: {variable['id']} has duplicate option id {opt_id!r}")
+        for option in variable['options']:
+            if any(f'[{var_id}]' in option['value'] for var_id in variable_ids):
+                problems.append(f"{mp_id}: {variable['id']}.{option['id']} value contains a placeholder")
+        defaults = variable['default'] if isinstance(variable['default'], list) else [variable['default']]
+        for default in defaults:
+            if default and default not in option_ids:
+                problems.append(f"{mp_id}: {variable['id']} default {default!r} is not one of its options")
+    return problems
+
+
+def _value(variable, options, selected):
+    """Option value for one variable, with resolvePrompt's fallbacks (unknown ids are custom text)."""
+    if selected is None:
+        selected = variable['default']
+    if variable['type'] == 'multi-select':
+        ids = selected if isinstance(selected, list) else []
+        values = [options.get(i, i) for i in ids]
+        return '. '.join(v for v in values if v)
+    selected_id = selected if isinstance(selected, str) else ''
+    return options.get(selected_id, selected_id)
+
+
+def resolve(compiled, variables=None):
+    """Fill a compiled template in one pass; same result as filtersService.resolvePrompt."""
+    variables = variables or {}
+    values = {}
+    for slot in compiled['slots']:
+        spec = compiled['variables'][slot]
+        values[slot] = _value(spec, spec['options'], variables.get(slot))
+    if any('[' in value or '$' in value for value in values.values()):
+        # Custom text can hold a later placeholder or a replacement pattern.
+        return _replace_sequentially(_template_text(compiled), compiled['variables'], values)
+    parts = [compiled['segments'][0]]
+    for slot, segment in zip(compiled['slots'], compiled['segments'][1:]):
+        parts.append(values[slot])
+        parts.append(segment)
+    return ''.join(parts)
+
+
+def _template_text(compiled):
+    parts = [compiled['segments'][0]]
+    for slot, segment in zip(compiled['slots'], compiled['segments'][1:]):
+        parts.append(f'[{slot}]')
+        parts.append(segment)
+    return ''.join(parts)
+
+
+def _js_replace_first(text, pattern, replacement):
+    """``text.replace(pattern, replacement)`` with a string pattern, as JavaScript does it."""
+    start = text.find(pattern)
+    if start < 0:
+        return text
+    end = start + len(pattern)
+    special = {'$$': '$', '$&': pattern, '$`': text[:start], "$'": text[end:]}
+    return text[:start] + _JS_REPLACEMENT.sub(lambda m: special[m.group(0)], replacement) + text[end:]
+
+
+def _replace_sequentially(prompt, variable_ids, values):
+    for var_id in variable_ids:
+        prompt = _js_replace_first(prompt, f'[{var_id}]', values[var_id])
+    return prompt
+
+
+def compile_master_prompt(master):
+    variables = {
+        v['id']: {
+            'type': v['type'],
+            'default': v['default'],
+            'options': {o['id']: o['value'] for o in v['options']},
+        }
+        for v in master['variables']
+    }
+
+    prompt = master['prompt']
+    # validate_master_prompt guarantees each placeholder appears exactly once.
+    found = sorted((prompt.index(f'[{var_id}]'), var_id) for var_id in variables)
+    segments, slots = [], []
+    pos = 0
+    for start, var_id in found:
+        segments.append(prompt[pos:start])
+        slots.append(var_id)
+        pos = start + len(var_id) + 2
+    segments.append(prompt[pos:])
+
+    compiled = {'id': master['id'], 'segments': segments, 'slots': slots, 'variables': variables}
+    compiled['defaultPrompt'] = resolve(compiled)
+    return compiled
+
+
+def _resolve_like_server(master, variables=None):
+    """Sequential String.replace, exactly as filtersService.resolvePrompt does it."""
+    variables = variables or {}
+    values = {}
+    for variable in master['variables']:
+        options = {o['id']: o['value'] for o in variable['options']}
+        values[variable['id']] = _value(variable, options, variables.get(variable['id']))
+    return _replace_sequentially(master['prompt'], [v['id'] for v in master['variables']], values)
+
+
+def compile_templates(data):
+    """Validate and compile every master prompt; raises TemplateError listing all problems."""
+    masters = data.get('masterPrompts', [])
+    problems = [p for master in masters for p in validate_master_prompt(master)]
+    if problems:
+        raise TemplateError(problems)
+
+    compiled = [compile_master_prompt(master) for master in masters]
+    for master, template in zip(masters, compiled):
+        if template['defaultPrompt'] != _resolve_like_server(master):
+            raise TemplateError([f"{master['id']}: compiled default prompt differs from resolvePrompt"])
+    return {'version': TEMPLATES_VERSION, 'masterPrompts': compiled}
@@ -0,0 +1,21 @@
+import json
+
+from bench import generate_catalog, param_changes
+from bundles import build_artifacts
+from templates import compile_templates
+
+
+def test_generated_catalog_builds(tmp_path):
+    path = tmp_path / 'catalog.json'
+    generate_catalog(path, 3000, seed=1)
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert len(data['filters']) == 3000 and len(data['masterPrompts']) == 3
+    compile_templates(data)
+    assert build_artifacts(data)
+
+
+def test_results_with_other_params_are_not_comparable():
+    params = {'miss_rate': 0.1, 'pending_rate': 0.5, 'seed': 0}
+    assert param_changes({'params': params}, {'params': dict(params)}) == []
+    assert param_changes({'params': params}, {'params': {**params, 'seed': 3}}) == ['seed 3 -> 0']
+    assert param_changes({'params': params}, {}) == ['miss_rate None -> 0.1', 'pending_rate None -> 0.5', 'seed None -> 0']
@@ -0,0 +1,48 @@
+import pytest
+
+from bundles import STORE_NAME, PromptStore, encode_prompt_store
+
+
+def test_empty_store():
+    store = PromptStore(encode_prompt_store({}))
+    assert len(store) == 0
+    assert store.ids() == []
+    assert store.get('anything') is None
+    assert store.get('') is None
+
+
+def test_multibyte_ids_and_prompts_round_trip():
+    prompts = {
+        'ვარდი': 'ვარდისფერი ლოყები 🌹',
+        'роза': 'Розы на щеках',
+        'rose': 'Rose cheeks',
+        'rosé': 'Pink wine glow',
+        'a': '',
+        '🙂-smile': 'Smile.',
+    }
+    store = PromptStore(encode_prompt_store(prompts))
+    assert store.ids() == sorted(prompts)
+    for filter_id, prompt in prompts.items():
+        assert store.get(filter_id) == prompt
+
+
+def test_missing_ids_return_none():
+    store = PromptStore(encode_prompt_store({'glow-01': 'Glow.', 'glow-03': 'Glow more.', 'ვარდი': 'Rose.'}))
+    assert store.get('glow-02') is None       # between two ids
+    assert store.get('glow-0') is None        # prefix of an id
+    assert store.get('glow-010') is None      # an id is its prefix
+    assert store.get('aaa') is None and store.get('zzz') is None
+    assert store.get('ვარდ') is None
+    assert store.get('x' * 100) is None       # longer than the index width
+
+
+def test_open_maps_the_file(tmp_path):
+    path = tmp_path / STORE_NAME
+    path.write_bytes(encode_prompt_store({'a': 'Alpha.', 'b': 'Beta.'}))
+    store = PromptStore.open(path)
+    assert (store.get('b'), store.get('c')) == ('Beta.', None)
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        PromptStore(b'JUNK' + encode_prompt_store({'a': 'b'})[4:])
@@ -0,0 +1,99 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+
+import translate
+from fragments import MIN_OCCURRENCES, _merge_pairs, compact_prompts, expand, split_sentences
+from streaming import compact_json
+
+
+def _naive_merge_pairs(sequences, frags):
+    """The original full-rescan merge: recount every pair after every merge."""
+    while True:
+        pairs = Counter()
+        for seq in sequences:
+            for a, b in zip(seq, seq[1:]):
+                if isinstance(a, int) and isinstance(b, int):
+                    pairs[a, b] += 1
+        if not pairs:
+            return
+        (a, b), count = max(pairs.items(), key=lambda kv: (kv[1], -kv[0][0], -kv[0][1]))
+        if count < MIN_OCCURRENCES:
+            return
+        frags.append(frags[a] + frags[b])
+        merged = len(frags) - 1
+        for seq in sequences:
+            i = 0
+            while i < len(seq) - 1:
+                if seq[i] == a and seq[i + 1] == b:
+                    seq[i:i + 2] = [merged]
+                i += 1
+
+
+def _random_sequences(rng, alphabet):
+    sequences = []
+    for _ in range(rng.randrange(1, 12)):
+        seq = []
+        for _ in range(rng.randrange(0, 30)):
+            roll = rng.random()
+            if roll < 0.1:
+                seq.append(f'literal {rng.randrange(3)}. ')
+            elif roll < 0.3 and seq:
+                seq.extend([seq[-1]] * rng.randrange(1, 5))   # runs like a a a a
+            else:
+                seq.append(rng.randrange(alphabet))
+        sequences.append(seq)
+    return sequences
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_merge_pairs_matches_the_naive_merge(seed):
+    rng = random.Random(seed)
+    alphabet = rng.choice([1, 2, 3, 5, 8])
+    sequences = _random_sequences(rng, alphabet)
+    frags = [f'<{i}>' for i in range(alphabet)]
+
+    expected_sequences, expected_frags = [list(s) for s in sequences], list(frags)
+    _naive_merge_pairs(expected_sequences, expected_frags)
+    _merge_pairs(sequences, frags)
+    assert (sequences, frags) == (expected_sequences, expected_frags)
+
+
+@pytest.mark.parametrize('run', [2, 3, 4, 5, 7, 8])
+def test_runs_of_one_fragment(run):
+    sequences = [[0] * run, [0] * run, [1, 0, 0, 1]]
+    expected_sequences = [list(s) for s in sequences]
+    expected_frags = ['a', 'b']
+    _naive_merge_pairs(expected_sequences, expected_frags)
+    frags = ['a', 'b']
+    _merge_pairs(sequences, frags)
+    assert (sequences, frags) == (expected_sequences, expected_frags)
+
+
+def _check_round_trip(data, **kwargs):
+    doc, stats = compact_prompts(data, **kwargs)
+    doc = json.loads(compact_json(doc))
+    for item in data['filters']:
+        assert expand(doc['filters'][item['id']], doc['fragments']) == item['prompt']
+    for master in data.get('masterPrompts', []):
+        assert expand(doc['masterPrompts'][master['id']], doc['fragments']) == master['prompt']
+    assert stats.fragments == len(doc['fragments'])
+    return doc, stats
+
+
+def test_compact_prompts_round_trips_the_real_catalog():
+    data = json.loads(translate.PROMPTS_PATH.read_text(encoding='utf-8'))
+    _, stats = _check_round_trip(data)
+    assert stats.compacted_bytes < stats.original_bytes
+
+
+def test_compact_prompts_round_trips_random_prompts():
+    rng = random.Random(0)
+    sentences = ['Keep the skin texture. ', 'Soft light!  ', 'No edits?\n', 'Glow. ', 'წითელი ტუჩები. ', 'end']
+    filters = [{'id': f'f{i}', 'prompt': ''.join(rng.choice(sentences) for _ in range(rng.randrange(0, 12)))}
+               for i in range(60)]
+    masters = [{'id': 'm', 'prompt': 'Glow. Glow. Glow. [BACKGROUND]'}]
+    doc, stats = _check_round_trip({'filters': filters, 'masterPrompts': masters}, min_length=1)
+    assert stats.refs and any(len(split_sentences(fragment)) > 1 for fragment in doc['fragments'])
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import pytest
+
+import machine_translate as mt
+from machine_translate import RateLimitError, StubTranslator
+
+
+def run(translator, sources, checkpoint=None, concurrency=2, max_retries=mt.DEFAULT_MAX_RETRIES):
+    return asyncio.run(mt.translate_all(translator, sources, checkpoint, concurrency, max_retries))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of waiting them out."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(mt.asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+class FlakyTranslator:
+    """Rate-limited (without retry_after) for the first ``failures`` calls."""
+
+    max_batch_items = 50
+    max_batch_chars = 4000
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def translate(self, texts, target):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimitError()
+        return [f'{target}:{text}' for text in texts]
+
+
+def test_rate_limited_batches_are_retried(sleeps):
+    translator = StubTranslator(rate_limit_every=2)
+    sources = [f'text {i}' for i in range(120)]
+    done, errors = run(translator, sources)
+    assert errors == []
+    assert len(done) == 2 * len(sources)
+    assert done[('text 7', 'ka')] == '[ქა] text 7'
+    assert translator.calls > 6   # 3 batches x 2 locales, plus the retries
+
+
+def test_backoff_grows_exponentially_with_jitter(sleeps, monkeypatch):
+    monkeypatch.setattr(mt, 'TARGET_LOCALES', ('ka',))
+    done, errors = run(FlakyTranslator(failures=3), ['Glow'], concurrency=1)
+    assert errors == [] and done[('Glow', 'ka')] == 'ka:Glow'
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        full = min(mt.MAX_BACKOFF, mt.BASE_BACKOFF * 2 ** attempt)
+        assert full * 0.5 <= delay <= full
+
+
+def test_gives_up_after_max_retries(sleeps):
+    translator = FlakyTranslator(failures=100)
+    done, errors = run(translator, ['Glow'], concurrency=1, max_retries=2)
+    assert done == {}
+    assert len(errors) == 2 and all(isinstance(e, RateLimitError) for e in errors)
+    assert translator.calls == 2 * 3   # per locale: first try + 2 retries
+
+
+def test_wrong_result_count_fails_the_batch():
+    class ShortTranslator(StubTranslator):
+        async def translate(self, texts, target):
+            return (await super().translate(texts, target))[:-1]
+
+    done, errors = run(ShortTranslator(), ['a', 'b'])
+    assert done == {}
+    assert [type(e) for e in errors] == [ValueError, ValueError]
+    assert 'returned 1 results for 2 texts' in str(errors[0])
+
+
+def test_resumes_from_checkpoint_with_torn_last_line(tmp_path):
+    checkpoint = tmp_path / 'cp.jsonl'
+    rows = [{'backend': 'stub', 'source': 'a', 'locale': 'ka', 'text': 'ა'},
+            {'backend': 'stub', 'source': 'a', 'locale': 'ru', 'text': 'а'}]
+    checkpoint.write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in rows)
+                          + '{"backend": "stub", "source": "b", "loc', encoding='utf-8')
+    translator = StubTranslator()
+    done, errors = run(translator, ['a', 'b'], checkpoint)
+    assert errors == []
+    assert done[('a', 'ka')] == 'ა' and done[('b', 'ka')] == '[ქა] b'
+    assert sorted(translator.sent) == [('ka', ['b']), ('ru', ['b'])]
+
+
+def test_checkpoint_rows_from_another_backend_are_ignored(tmp_path):
+    checkpoint = tmp_path / 'cp.jsonl'
+    checkpoint.write_text(json.dumps({'backend': 'other', 'source': 'a', 'locale': 'ka', 'text': 'x'}) + '\n'
+                          + json.dumps({'source': 'a', 'locale': 'ru', 'text': 'y'}) + '\n', encoding='utf-8')
+    translator = StubTranslator()
+    done, _ = run(translator, ['a'], checkpoint)
+    assert done == {('a', 'ka'): '[ქა] a', ('a', 'ru'): '[ру] a'}
+    assert len(translator.sent) == 2
+
+
+def test_checkpoint_is_removed_after_a_clean_run_and_kept_after_failures(tmp_path, sleeps):
+    checkpoint = tmp_path / 'cp.jsonl'
+    run(StubTranslator(), ['a'], checkpoint)
+    assert not checkpoint.exists()
+
+    class HalfBroken(StubTranslator):
+        async def translate(self, texts, target):
+            if target == 'ru':
+                raise RateLimitError(retry_after=0)
+            return await super().translate(texts, target)
+
+    _, errors = run(HalfBroken(), ['a'], checkpoint, max_retries=0)
+    assert len(errors) == 1
+    rows = [json.loads(line) for line in checkpoint.read_text(encoding='utf-8').splitlines()]
+    assert rows == [{'backend': 'stub', 'source': 'a', 'locale': 'ka', 'text': '[ქა] a'}]
+
+
+def test_targets_are_deduplicated_across_filters_categories_and_options():
+    item = {'id': 'f', 'name_ka': 'Glow', 'name_ru': ''}
+    category = {'id': 'c', 'label_en': 'Glow', 'label_ka': 'Glow', 'label_ru': 'Glow'}
+    option = {'id': 'o', 'label_en': 'Glow', 'value': '...'}
+    data = {
+        'filters': [item],
+        'categories': [category],
+        'masterPrompts': [{'id': 'm', 'variables': [{'id': 'V', 'options': [option]}]}],
+    }
+    translator = StubTranslator()
+    changed, _, errors = mt.machine_translate(data, [(item, 'name')], translator)
+    assert errors == []
+    assert sorted(translator.sent) == [('ka', ['Glow']), ('ru', ['Glow'])]
+    assert [t.kind for t in changed] == ['name', 'label', 'label']
+    assert item['name_ka'] == category['label_ka'] == option['label_ka'] == '[ქა] Glow'
+    assert option['label_ru'] == '[ру] Glow'
+
+
+def test_stub_is_not_a_cli_backend():
+    with pytest.raises(ValueError):
+        mt.load_translator('stub')
+    with pytest.raises(ValueError):
+        mt.load_translator('machine_translate:StubTranslator')
+
+
+class BrandKeeper(StubTranslator):
+    """Keeps names listed in ``brands`` as they are, tags everything else."""
+
+    def __init__(self, brands):
+        super().__init__()
+        self.brands = brands
+
+    async def translate(self, texts, target):
+        tagged = await super().translate(texts, target)
+        return [text if text in self.brands else out for text, out in zip(texts, tagged)]
+
+
+def test_latin_answers_are_remembered_across_clean_runs(tmp_path):
+    checkpoint = tmp_path / 'cp.jsonl'
+    category = {'id': 'c', 'label_en': 'Clean Girl', 'label_ka': '', 'label_ru': ''}
+    item = {'id': 'f', 'name_ka': 'Coquette', 'name_ru': 'Coquette'}
+    other = {'id': 'g', 'name_ka': 'Glow', 'name_ru': 'Glow'}
+    data = {'filters': [item, other], 'categories': [category]}
+
+    first = BrandKeeper({'Clean Girl', 'Coquette'})
+    _, _, errors = mt.machine_translate(data, [(item, 'name'), (other, 'name')], first, checkpoint)
+    assert errors == []
+    assert category['label_ka'] == 'Clean Girl' and other['name_ka'] == '[ქა] Glow'
+    rows = [json.loads(line) for line in checkpoint.read_text(encoding='utf-8').splitlines()]
+    assert sorted((r['source'], r['locale']) for r in rows) == [
+        ('Clean Girl', 'ka'), ('Clean Girl', 'ru'), ('Coquette', 'ka'), ('Coquette', 'ru')]
+
+    # Both still look untranslated (label_ka == label_en, Latin name), so they
+    # are targets again, but the backend is not asked a second time.
+    second = BrandKeeper({'Clean Girl', 'Coquette'})
+    changed, translations, errors = mt.machine_translate(data, [(item, 'name')], second, checkpoint)
+    assert errors == [] and changed == [] and second.calls == 0
+    assert translations[('Coquette', 'ka')] == 'Coquette'
+    assert checkpoint.exists()
@@ -0,0 +1,127 @@
+import json
+import random
+
+import pytest
+
+from search_index import FIELDS, POPULAR_BOOST, SearchIndex, normalize, tokenize
+from streaming import compact_json
+
+
+def _filter(filter_id, en, ka='', ru='', description_en='', category='cat', popular=False):
+    return {
+        'id': filter_id, 'categoryId': category, 'isPopular': popular,
+        'name_en': en, 'name_ka': ka, 'name_ru': ru,
+        'description_en': description_en, 'description_ka': '', 'description_ru': '',
+    }
+
+
+def _index(*filters):
+    categories = [{'id': 'cat', 'label_en': 'Beauty', 'label_ka': 'სილამაზე', 'label_ru': 'Красота'}]
+    return SearchIndex.build({'filters': list(filters), 'categories': categories})
+
+
+def _ids(results):
+    return [filter_id for filter_id, _ in results]
+
+
+def test_normalize_folds_case_mtavruli_yo_and_latin_accents():
+    assert normalize('ᲕᲐᲠᲓᲘ') == 'ვარდი'
+    assert normalize('Ёлка') == 'елка'
+    assert normalize('Café Crème') == 'cafe creme'
+    assert normalize('Йога') == 'йога'
+    assert tokenize('Golden-Hour  glow!') == ['golden', 'hour', 'glow']
+
+
+def test_short_prefix_is_not_lost_behind_many_completions():
+    fillers = [_filter(f'filler-{i}', f'ha{i:03d}') for i in range(100)]
+    index = _index(*fillers, _filter('golden', 'Golden Hour Glow'))
+    assert _ids(index.search('golden h')) == ['golden']
+    assert _ids(index.search('golden ho')) == ['golden']
+    assert _ids(index.search('h golden')) == ['golden']
+    assert len(index.search('ha', limit=1000)) == 100
+
+
+def test_every_token_must_match():
+    index = _index(_filter('a', 'Golden Hour'), _filter('b', 'Golden Glow'))
+    assert _ids(index.search('golden glow')) == ['b']
+    assert index.search('golden neon') == []
+    assert index.search('   ') == []
+
+
+def test_exact_beats_prefix_and_name_beats_description():
+    index = _index(
+        _filter('exact', 'Glow'),
+        _filter('prefix', 'Glowing'),
+        _filter('described', 'Shine', description_en='soft glow'),
+    )
+    assert _ids(index.search('glow')) == ['exact', 'prefix', 'described']
+
+
+def test_popular_filters_are_boosted():
+    index = _index(_filter('plain', 'Neon'), _filter('popular', 'Neon', popular=True))
+    (first, top), (_, second) = index.search('neon')
+    assert first == 'popular' and top > second
+
+
+def test_substring_and_stem_fallbacks():
+    index = _index(_filter('rose', 'Rose', ru='Розы на щеках'), _filter('mirror', 'Mirrorball'))
+    assert _ids(index.search('rorb')) == ['mirror']
+    assert _ids(index.search('роза')) == ['rose']
+
+
+def test_locale_restriction_and_category_labels():
+    index = _index(_filter('a', 'Glow', ka='ნათება', ru='Сияние'))
+    assert _ids(index.search('сияние', locale='ru')) == ['a']
+    assert index.search('сияние', locale='en') == []
+    assert _ids(index.search('красота')) == ['a']
+
+
+def _brute_force(index, query, limit, locale):
+    """Score every doc on every token; the early-terminating paths must agree with this."""
+    allowed = [locale is None or field_locale == locale for field_locale, _ in FIELDS]
+    matchers = [index._matcher(token, locale) for token in sorted(dict.fromkeys(tokenize(query)), key=index._prefix_cost)]
+    if not matchers or None in matchers:
+        return []
+    ranked = []
+    for doc in range(len(index.ids)):
+        scores = [index._token_score(doc, matcher, allowed) for matcher in matchers]
+        if all(scores):
+            ranked.append((index._sum(scores) * (POPULAR_BOOST if index.popular[doc] else 1.0), -doc))
+    ranked.sort(reverse=True)
+    return [(index.ids[-neg_doc], round(score, 4)) for score, neg_doc in ranked[:limit]]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_search_matches_brute_force(seed, monkeypatch):
+    rng = random.Random(seed)
+    words = ['golden', 'glow', 'gold', 'hour', 'neon', 'haze', 'rose', 'rosy', 'h', 'g1', 'category']
+    filters = [_filter(f'f{i}', ' '.join(rng.sample(words, rng.randint(1, 3))),
+                       ru=rng.choice(['Розы', 'Сияние', '']),
+                       description_en=' '.join(rng.sample(words, rng.randint(0, 4))),
+                       popular=rng.random() < 0.2)
+               for i in range(rng.randint(1, 80))]
+    index = _index(*filters)
+    # A budget of 0 sends every multi-token query down the set-intersection path,
+    # and a ratio of 0 leaves all but one token to be checked per candidate there.
+    monkeypatch.setattr('search_index.WALK_BUDGET', rng.choice([0, 64]))
+    monkeypatch.setattr('search_index.SET_RATIO', rng.choice([0, 32]))
+    for _ in range(30):
+        query = ' '.join(rng.choice(words)[:rng.randint(1, 4)] for _ in range(rng.randint(1, 3)))
+        limit, locale = rng.choice([1, 3, 20]), rng.choice([None, 'en', 'ru'])
+        assert index.search(query, limit, locale) == _brute_force(index, query, limit, locale)
+
+
+def test_serialized_index_round_trips():
+    index = _index(_filter('a', 'Golden Hour'), _filter('b', 'Neon Glow'))
+    doc = json.loads(compact_json(index.to_json()))
+    assert 'texts' not in doc
+    loaded = SearchIndex.from_json(doc)
+    for query in ('golden', 'glo', 'eon', 'beauty'):
+        assert loaded.search(query) == index.search(query)
+
+
+def test_incompatible_index_is_rejected():
+    doc = _index(_filter('a', 'Glow')).to_json()
+    doc['version'] += 1
+    with pytest.raises(ValueError):
+        SearchIndex.from_json(doc)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import random
+
+import pytest
+
+import streaming
+from streaming import stream_catalog
+from translate import serialize
+
+
+def _stream(tmp_path, text, stages=()):
+    src, dst = tmp_path / 'src.json', tmp_path / 'dst.json'
+    src.write_text(text, encoding='utf-8')
+    wrote, seen, digest = stream_catalog(src, dst, list(stages))
+    out = dst.read_bytes()
+    assert digest == hashlib.sha256(out).hexdigest()
+    return out, wrote, seen
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return rng.choice([0, -1, 7, 10 ** 20, -(10 ** 18)]) + rng.randrange(1000)
+    if kind == 1:
+        return rng.choice([1.5, -0.25, 3e-7, 6.02e23, -1.25e-300]) * rng.randrange(1, 9)
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind in (3, 4):
+        return ''.join(rng.choice('ab "\\/\n\tწ🙂é.e-1') for _ in range(rng.randrange(12)))
+    if kind == 5:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f'k{i}': _random_value(rng, depth + 1) for i in range(rng.randrange(4))}
+
+
+def _random_catalog(rng):
+    doc = {f'm{i}': _random_value(rng) for i in range(rng.randrange(4))}
+    doc['filters'] = [{'id': f'f{i}', 'score': _random_value(rng), 'extra': _random_value(rng)}
+                      for i in range(rng.randrange(6))]
+    doc['tail'] = rng.choice([1.5, -2e-3, 42, [], {}])
+    return doc
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 13])
+def test_tiny_chunks_reproduce_serialize(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(streaming, 'CHUNK_SIZE', chunk_size)
+    rng = random.Random(chunk_size)
+    for _ in range(40):
+        doc = _random_catalog(rng)
+        text = json.dumps(doc, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2]))
+        out, _, seen = _stream(tmp_path, text)
+        assert out == serialize(json.loads(text))
+        assert seen == len(doc['filters'])
+
+
+def test_float_split_at_the_default_chunk_boundary(tmp_path):
+    head = '{"filters": [], "a": "'
+    tail = '", "b": 1.'
+    text = head + 'x' * (streaming.CHUNK_SIZE - len(head) - len(tail)) + tail + '5}'
+    assert len(text.split('1.')[0]) + 2 == streaming.CHUNK_SIZE
+    out, _, _ = _stream(tmp_path, text)
+    assert out == serialize(json.loads(text))
+
+
+@pytest.mark.parametrize('number', ['1.5', '-12.25e-3', '6E+2', '-0', '123456789'])
+def test_numbers_split_at_every_offset(tmp_path, monkeypatch, number):
+    text = '{"filters": [' + number + ', 2], "n": ' + number + '}'
+    for size in range(1, len(text) + 1):
+        monkeypatch.setattr(streaming, 'CHUNK_SIZE', size)
+        out, _, _ = _stream(tmp_path, text)
+        assert out == serialize(json.loads(text)), size
+
+
+def test_stages_see_every_filter_and_identical_output_is_not_rewritten(tmp_path, monkeypatch):
+    monkeypatch.setattr(streaming, 'CHUNK_SIZE', 5)
+    text = json.dumps({'filters': [{'id': 'a', 'w': 0.5}, {'id': 'b', 'w': 1e3}], 'v': 2.5})
+
+    def mark(items):
+        for item in items:
+            item['seen'] = True
+            yield item
+
+    out, wrote, seen = _stream(tmp_path, text, [mark])
+    expected = json.loads(text)
+    for item in expected['filters']:
+        item['seen'] = True
+    assert (out, wrote, seen) == (serialize(expected), True, 2)
+
+    dst = tmp_path / 'dst.json'
+    assert stream_catalog(dst, dst, []) == (False, 2, hashlib.sha256(out).hexdigest())
+    assert dst.read_bytes() == out
+
+
+def test_trailing_garbage_is_rejected_and_target_left_alone(tmp_path):
+    dst = tmp_path / 'dst.json'
+    dst.write_bytes(b'old')
+    src = tmp_path / 'src.json'
+    src.write_text('{"filters": []} x', encoding='utf-8')
+    with pytest.raises(ValueError):
+        stream_catalog(src, dst, [])
+    assert dst.read_bytes() == b'old'
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')] == []
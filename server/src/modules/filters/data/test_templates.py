@@ -0,0 +1,95 @@
+import json
+import random
+
+import pytest
+
+import translate
+from templates import TemplateError, _resolve_like_server, compile_master_prompt, compile_templates, resolve
+
+
+def _master(prompt, *variables):
+    return {'id': 'm', 'prompt': prompt, 'variables': list(variables)}
+
+
+def _select(var_id, default, **options):
+    return {'id': var_id, 'type': 'select', 'default': default,
+            'options': [{'id': k, 'value': v} for k, v in options.items()]}
+
+
+def _multi(var_id, default, **options):
+    return {**_select(var_id, default, **options), 'type': 'multi-select'}
+
+
+MASTER = _master(
+    'Background: [BACKGROUND]. Finish: [skin-finish]. [Extras] Done.',
+    _select('BACKGROUND', 'rose', rose='soft rose gradient', white='clean white studio', empty=''),
+    _select('skin-finish', 'dewy', dewy='dewy glow', matte='velvet matte'),
+    _multi('Extras', [], freckles='Add freckles', gloss='Glossy lips', blank=''),
+)
+
+
+def test_ids_are_matched_literally_not_by_pattern():
+    compiled = compile_templates({'masterPrompts': [MASTER]})['masterPrompts'][0]
+    assert compiled['slots'] == ['BACKGROUND', 'skin-finish', 'Extras']
+    assert compiled['defaultPrompt'] == 'Background: soft rose gradient. Finish: dewy glow.  Done.'
+
+
+@pytest.mark.parametrize('variables, expected', [
+    ({}, 'Background: soft rose gradient. Finish: dewy glow.  Done.'),
+    # Unknown ids are custom (AI-generated) text.
+    ({'BACKGROUND': 'misty forest at dawn'}, 'Background: misty forest at dawn. Finish: dewy glow.  Done.'),
+    # Known option with an empty value stays empty; '' for a select gives ''.
+    ({'BACKGROUND': 'empty', 'skin-finish': ''}, 'Background: . Finish: .  Done.'),
+    # Wrong type for a select: ''.
+    ({'skin-finish': ['matte']}, 'Background: soft rose gradient. Finish: .  Done.'),
+    # Multi-select drops empty values and empty ids, keeps custom text, joins with '. '.
+    ({'Extras': ['freckles', 'blank', '', 'sparkles', 'gloss']},
+     'Background: soft rose gradient. Finish: dewy glow. Add freckles. sparkles. Glossy lips Done.'),
+    # A string for a multi-select is not a list: nothing.
+    ({'Extras': 'freckles'}, 'Background: soft rose gradient. Finish: dewy glow.  Done.'),
+    # null means "use the default".
+    ({'BACKGROUND': None, 'Extras': None}, 'Background: soft rose gradient. Finish: dewy glow.  Done.'),
+])
+def test_resolve_matches_resolve_prompt(variables, expected):
+    compiled = compile_master_prompt(MASTER)
+    assert resolve(compiled, variables) == expected
+    assert _resolve_like_server(MASTER, variables) == expected
+
+
+def test_custom_text_is_replaced_sequentially_like_string_replace():
+    compiled = compile_master_prompt(MASTER)
+    # The custom background carries a later placeholder: String.replace fills that one instead.
+    variables = {'BACKGROUND': 'see [skin-finish]', 'skin-finish': 'matte'}
+    assert resolve(compiled, variables) == 'Background: see velvet matte. Finish: [skin-finish].  Done.'
+    # '$&' / '$$' are replacement patterns in JavaScript.
+    assert resolve(compiled, {'BACKGROUND': 'gold $& $$5'}) == \
+        'Background: gold [BACKGROUND] $5. Finish: dewy glow.  Done.'
+
+
+def test_resolve_agrees_with_the_server_on_random_selections():
+    data = json.loads(translate.PROMPTS_PATH.read_text(encoding='utf-8'))
+    rng = random.Random(0)
+    for master in data['masterPrompts'] + [MASTER]:
+        compiled = compile_master_prompt(master)
+        for _ in range(50):
+            variables = {}
+            for variable in master['variables']:
+                ids = [o['id'] for o in variable['options']] + ['custom text', '', 'x [y] $&']
+                if variable['type'] == 'multi-select':
+                    variables[variable['id']] = rng.sample(ids, rng.randint(0, 3))
+                elif rng.random() < 0.8:
+                    variables[variable['id']] = rng.choice(ids + [None])
+            assert resolve(compiled, variables) == _resolve_like_server(master, variables)
+
+
+@pytest.mark.parametrize('master, problem', [
+    (_master('No slot here.', _select('hair-color', 'a', a='A')), 'variable hair-color has no [hair-color] placeholder'),
+    (_master('[x] and [x]', _select('x', 'a', a='A')), 'placeholder [x] appears 2 times'),
+    (_master('[x] [TYPO]', _select('x', 'a', a='A')), 'placeholder [TYPO] has no matching variable'),
+    (_master('[x] [y]', _select('x', 'a', a='see [y]'), _select('y', 'b', b='B')), 'x.a value contains a placeholder'),
+    (_master('[x]', _select('x', 'missing', a='A')), "x default 'missing' is not one of its options"),
+])
+def test_invalid_templates_are_rejected(master, problem):
+    with pytest.raises(TemplateError) as err:
+        compile_templates({'masterPrompts': [master]})
+    assert err.value.problems == [f'm: {problem}']
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+import translate
+from metrics import RunMetrics
+from translation_memory import TranslationMemory
+
+
+def _filter(filter_id, name, description='Dewy, minimal, effortless, skin-from-within'):
+    return {
+        'id': filter_id, 'categoryId': 'cat',
+        'name_ka': name, 'name_ru': name, 'name_en': name,
+        'description_ka': description, 'description_ru': description, 'description_en': description,
+        'prompt': f'Edit the uploaded photo ({filter_id}).', 'previewUrl': '', 'isPopular': False,
+    }
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / 'prompts.json'
+    data = {
+        'categories': [{'id': 'cat', 'label_ka': 'ბიუთი', 'label_ru': 'Красота', 'label_en': 'Beauty'}],
+        'filters': [
+            _filter('done', 'Bold Red Lip'),
+            _filter('haze', 'Midnight Velvet Haze'),
+            _filter('dusk', 'Quiet Amber Dusk'),
+        ],
+    }
+    path.write_bytes(translate.serialize(data))
+    return path
+
+
+def _run(catalog, lookup=None):
+    metrics = RunMetrics('incremental')
+    translate.run_incremental(catalog, catalog.with_suffix('.manifest.json'), lookup or translate.MapLookup(),
+                              metrics=metrics)
+    return metrics.to_json()
+
+
+def _filters(catalog):
+    return {item['id']: item for item in json.loads(catalog.read_bytes())['filters']}
+
+
+def _pending(catalog):
+    manifest = json.loads(catalog.with_suffix('.manifest.json').read_text(encoding='utf-8'))
+    return sorted(filter_id for filter_id, record in manifest['filters'].items() if record.get('pending'))
+
+
+def test_second_run_does_not_write(catalog):
+    first = _run(catalog)
+    assert first['entries']['translated'] == 3     # every description, one name
+    assert _filters(catalog)['done']['name_ka'] == 'მკვეთრი წითელი ტუჩსაცხი'
+    assert _pending(catalog) == ['dusk', 'haze']
+    mtime = catalog.stat().st_mtime_ns
+
+    second = _run(catalog)
+    assert second['written'] == {}
+    assert 'serialize' not in second['stages']   # output == input hash: not even re-serialized
+    assert second['entries']['translated'] == 0
+    assert second['entries']['checked'] == 2      # only the two pending entries are looked at again
+    assert catalog.stat().st_mtime_ns == mtime
+
+
+def test_map_edit_retranslates_only_the_affected_pending_entry(catalog, monkeypatch, capsys):
+    _run(catalog)
+    before = _filters(catalog)
+
+    monkeypatch.setitem(translate.names_map, 'Midnight Velvet Haze', {'ka': 'შუაღამის ხავერდი', 'ru': 'Полночный бархат'})
+    capsys.readouterr()
+    metrics = _run(catalog)
+
+    after = _filters(catalog)
+    assert after['haze']['name_ka'] == 'შუაღამის ხავერდი' and after['haze']['name_ru'] == 'Полночный бархат'
+    assert after['dusk'] == before['dusk'] and after['done'] == before['done']
+    assert metrics['entries']['translated'] == 1
+    assert '  translated haze\n' in capsys.readouterr().out
+    assert _pending(catalog) == ['dusk']
+
+
+def test_pending_entry_is_picked_up_once_the_tm_has_it(catalog, tmp_path):
+    with TranslationMemory(tmp_path / 'tm.sqlite') as tm:
+        _run(catalog, translate.MemoryLookup(tm))
+        assert _filters(catalog)['dusk']['name_ka'] == 'Quiet Amber Dusk'
+
+        tm.add_many('name', [('Quiet Amber Dusk', 'მშვიდი ქარვისფერი ბინდი', 'Тихие янтарные сумерки')])
+        metrics = _run(catalog, translate.MemoryLookup(tm))
+
+    assert _filters(catalog)['dusk']['name_ka'] == 'მშვიდი ქარვისფერი ბინდი'
+    assert metrics['entries']['translated'] == 1
+    assert _pending(catalog) == ['haze']
+
+
+def test_external_edit_is_rewritten_and_removed_filter_reported(catalog, capsys):
+    _run(catalog)
+    data = json.loads(catalog.read_bytes())
+    data['filters'] = [item for item in data['filters'] if item['id'] != 'dusk']
+    catalog.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')   # not in serialize()'s layout
+    capsys.readouterr()
+
+    metrics = _run(catalog)
+    assert '  removed dusk\n' in capsys.readouterr().out
+    assert metrics['entries']['total'] == 2
+    assert catalog.read_bytes() == translate.serialize(data)
+    assert 'dusk' not in json.loads(catalog.with_suffix('.manifest.json').read_text(encoding='utf-8'))['filters']
+
+
+@pytest.mark.parametrize('flags', [['--review-fuzzy'], ['--fuzzy-threshold', '0.9']])
+def test_fuzzy_flags_need_tm(catalog, flags, capsys):
+    before = catalog.read_bytes()
+    with pytest.raises(SystemExit):
+        translate.main(['--input', str(catalog), *flags])
+    assert 'need --tm' in capsys.readouterr().err
+    assert catalog.read_bytes() == before
+
+
+def _build(catalog):
+    """An incremental run plus --build. Returns (artifact digests, files written)."""
+    manifest = catalog.with_suffix('.manifest.json')
+    metrics = RunMetrics('incremental')
+    data = translate.run_incremental(catalog, manifest, translate.MapLookup(), metrics=metrics)
+    artifacts = translate.run_build(data, catalog.parent / 'out', metrics, manifest)
+    return artifacts, set(metrics.written) - {catalog.name, manifest.name}
+
+
+def _edit(catalog, change):
+    data = json.loads(catalog.read_bytes())
+    change(data)
+    catalog.write_bytes(translate.serialize(data))
+
+
+def test_build_skips_artifacts_whose_inputs_did_not_change(catalog):
+    artifacts, written = _build(catalog)
+    assert written == set(artifacts) and len(artifacts) == 7
+    assert _build(catalog) == (artifacts, set())
+
+    _edit(catalog, lambda data: data['filters'][0].update(prompt='Keep the background soft.'))
+    changed, written = _build(catalog)
+    assert written == {'prompts.bin', 'fragments.json'}
+    assert {name for name in artifacts if changed[name] != artifacts[name]} == written
+
+    _edit(catalog, lambda data: data['filters'][1].update(previewUrl='/haze.webp'))
+    _, written = _build(catalog)
+    assert written == {'catalog.ka.json', 'catalog.ru.json', 'catalog.en.json'}   # search index bytes unchanged
+
+
+def test_build_replaces_missing_or_edited_artifacts(catalog):
+    artifacts, _ = _build(catalog)
+    out = catalog.parent / 'out'
+    (out / 'templates.json').unlink()
+    (out / 'catalog.ka.json').write_text('{}', encoding='utf-8')
+    assert _build(catalog) == (artifacts, {'templates.json', 'catalog.ka.json'})
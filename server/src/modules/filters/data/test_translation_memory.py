@@ -0,0 +1,96 @@
+import pytest
+
+import translate
+from translation_memory import QUERY_CHUNK, TranslationMemory, normalize_key
+
+
+@pytest.fixture
+def tm(tmp_path):
+    with TranslationMemory(tmp_path / 'tm.sqlite') as memory:
+        yield memory
+
+
+def test_normalize_key_folds_quotes_dashes_and_spacing():
+    assert normalize_key('Valentine’s  Day') == normalize_key("valentine's day")
+    assert normalize_key('“Neon” – Glow') == normalize_key('"neon" - glow')
+    assert normalize_key('  Soft\tFocus\n') == 'soft focus'
+
+
+def test_normalize_key_applies_nfkc():
+    assert normalize_key('Ｇｌｏｗ') == 'glow'             # fullwidth
+    assert normalize_key('ﬁlm grain') == 'film grain'     # ligature
+    assert normalize_key('Café') == normalize_key('Café')
+
+
+def test_exact_lookup_uses_normalized_key(tm):
+    tm.add_many('name', [('Valentine’s Day', 'ვალენტინობა', 'День Валентина')])
+    match = tm.lookup_many('name', ["valentine's   day"])["valentine's   day"]
+    assert (match.ka, match.score) == ('ვალენტინობა', 1.0)
+    assert tm.lookup_many('desc', ["valentine's day"]) == {}
+
+
+def test_fuzzy_threshold(tmp_path):
+    rows = [('Midnight Velvet Haze', 'ოქროს საათი', 'Золотой час')]
+    with TranslationMemory(tmp_path / 'loose.sqlite', threshold=0.9) as loose:
+        loose.add_many('name', rows)
+        match = loose.lookup_many('name', ['Midnight Velvet Hazes'])['Midnight Velvet Hazes']
+        assert match.source == 'Midnight Velvet Haze'
+        assert 0.9 <= match.score < 1.0
+        assert loose.lookup_many('name', ['Midnight Velvet Hazes'], fuzzy=False) == {}
+        assert loose.lookup_many('name', ['Silver Night']) == {}
+    with TranslationMemory(tmp_path / 'strict.sqlite', threshold=0.99) as strict:
+        strict.add_many('name', rows)
+        assert strict.lookup_many('name', ['Midnight Velvet Hazes']) == {}
+
+
+def test_lookup_batches_across_query_chunks(tm):
+    count = QUERY_CHUNK * 2 + 17
+    tm.add_many('name', [(f'Filter {i}', f'ფილტრი {i}', f'Фильтр {i}') for i in range(count)])
+    texts = [f'filter {i}' for i in range(count)] + ['Missing filter']
+    found = tm.lookup_many('name', texts, fuzzy=False)
+    assert len(found) == count
+    assert found[f'filter {count - 1}'].ru == f'Фильтр {count - 1}'
+
+
+def test_revision_bumps_only_on_real_changes(tm):
+    start = tm.revision()
+    assert tm.add_many('name', [('Soft Focus', 'რბილი', 'Мягкий')]) == 1
+    assert tm.revision() == start + 1
+    assert tm.add_many('name', [('soft  focus', 'რბილი', 'Мягкий')]) == 0
+    assert tm.revision() == start + 1
+    assert tm.add_many('name', [('Soft Focus', 'რბილი ფოკუსი', 'Мягкий')]) == 1
+    assert tm.revision() == start + 2
+
+
+def test_added_entry_is_not_served_stale_from_cache(tm):
+    assert tm.lookup_many('name', ['Soft Focus'], fuzzy=False) == {}
+    tm.add_many('name', [('Soft Focus', 'რბილი', 'Мягкий')])
+    assert tm.lookup_many('name', ['Soft Focus'], fuzzy=False)['Soft Focus'].ka == 'რბილი'
+
+
+def _memory_lookup(tm, **kwargs):
+    tm.add_many('name', [('Midnight Velvet Haze', 'ოქროს საათი', 'Золотой час')])
+    return translate.MemoryLookup(tm, **kwargs)
+
+
+def test_memory_lookup_applies_fuzzy_matches_by_default(tm):
+    names, _, fuzzy = _memory_lookup(tm).resolve([{'id': 'a', 'name_ka': 'Midnight Velvet Hazes'}])
+    assert names['Midnight Velvet Hazes']['ka'] == 'ოქროს საათი'
+    assert [text for text, _ in fuzzy] == ['Midnight Velvet Hazes']
+
+
+def test_memory_lookup_review_mode_reports_without_applying(tm):
+    lookup = _memory_lookup(tm, apply_fuzzy=False)
+    item = {'id': 'a', 'name_ka': 'Midnight Velvet Hazes', 'name_ru': ''}
+    names, descs, fuzzy = lookup.resolve([item])
+    assert names == {}
+    assert [match.source for _, match in fuzzy] == ['Midnight Velvet Haze']
+    assert not translate.translate_filter(item, names, descs)
+    assert translate._is_pending(item, names, descs)
+    assert lookup.version() != _memory_lookup(tm).version()
+
+
+def test_cached_miss_is_dropped_when_a_close_entry_is_added(tm):
+    assert tm.lookup_many('name', ['Midnight Velvet Hazes']) == {}
+    tm.add_many('name', [('Midnight Velvet Haze', 'ოქროს საათი', 'Золотой час')])
+    assert tm.lookup_many('name', ['Midnight Velvet Hazes'])['Midnight Velvet Hazes'].score < 1.0
@@ -0,0 +1,65 @@
+import json
+import shutil
+
+import watch
+
+
+class ScriptedWatcher:
+    """Delivers one batch of events per entry in ``script``, then stops the loop."""
+
+    def __init__(self, script):
+        self.script = list(script)
+
+    def wait(self, timeout=None):
+        if timeout is not None:
+            return set()  # debounce window: quiet
+        if not self.script:
+            raise KeyboardInterrupt
+        return self.script.pop(0)
+
+    def close(self):
+        pass
+
+
+def _run_watch(tmp_path, monkeypatch, events, during_build=None):
+    catalog = tmp_path / 'prompts.json'
+    shutil.copy(watch.PROMPTS_PATH, catalog)
+    monkeypatch.setattr(watch, 'make_watcher', lambda *a, **k: ScriptedWatcher(events(catalog)))
+
+    builds = []
+    real_run = watch.subprocess.run
+
+    def run(cmd, **kwargs):
+        result = real_run(cmd, **kwargs)
+        builds.append(cmd)
+        if during_build:
+            during_build(catalog, len(builds))
+        return result
+
+    monkeypatch.setattr(watch.subprocess, 'run', run)
+    watch.main(['--input', str(catalog), '--out-dir', str(tmp_path / 'out')])
+    return catalog, len(builds)
+
+
+def _edit(catalog):
+    data = json.loads(catalog.read_text(encoding='utf-8'))
+    data['filters'][0]['prompt'] += ' Keep the background soft.'
+    catalog.write_text(json.dumps(data, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+
+def test_own_writes_and_touches_do_not_rebuild(tmp_path, monkeypatch):
+    _, builds = _run_watch(tmp_path, monkeypatch, lambda catalog: [{catalog}, {catalog}])
+    assert builds == 1  # startup only
+
+
+def test_save_during_a_build_is_rebuilt(tmp_path, monkeypatch):
+    # The save lands after translate.py read the catalog and chose not to
+    # rewrite it; the queued event must still trigger a second build.
+    def during_build(catalog, build):
+        if build == 1:
+            _edit(catalog)
+
+    catalog, builds = _run_watch(tmp_path, monkeypatch, lambda catalog: [{catalog}], during_build)
+    assert builds == 2
+    marker = json.loads(catalog.with_suffix('.ready.json').read_text(encoding='utf-8'))
+    assert marker['catalog'] == watch.digest(catalog)
@@ -1,6 +1,39 @@
+"""Translate pending filter names/descriptions in prompts.json.
+
+New filters are added with the English text in ``name_ka``/``description_ka``;
+this script swaps in the Georgian and Russian strings from the maps below.
+
+    python translate.py                  # full pass, always rewrites prompts.json
+    python translate.py --incremental    # only touch changed entries, skip no-op writes
+    python translate.py --build          # also emit per-locale bundles + prompts.bin (see bundles.py)
+    python translate.py --incremental --build   # only rebuild artifacts whose inputs changed
+    python translate.py --tm tm.sqlite   # normalized/fuzzy lookups via translation_memory.py
+    python translate.py --tm tm.sqlite --review-fuzzy   # list fuzzy matches, don't apply them
+    python translate.py --mt pkg.mod:factory   # machine-translate leftovers (see machine_translate.py)
+    python translate.py --stream         # flat-memory pass for huge catalogs (see streaming.py)
+    python translate.py --metrics m.jsonl --ready-marker prompts.ready.json
+    python watch.py                      # rebuild on every edit (see watch.py)
+"""
+import argparse
+import hashlib
 import json
+from pathlib import Path
+
+from bundles import BUILDERS, builder_inputs, run_builder
+from machine_translate import (DEFAULT_CONCURRENCY, DEFAULT_MAX_RETRIES, is_georgian, load_translator,
+                               machine_translate)
+from metrics import RunMetrics, format_metrics
+from streaming import CHUNK_SIZE, atomic_writer, stream_catalog
+from translation_memory import DEFAULT_THRESHOLD, TranslationMemory
 
-data = json.load(open('C:/Users/User/Desktop/GITHUB/lashme/server/src/modules/filters/data/prompts.json', 'r', encoding='utf-8'))
+DATA_DIR = Path(__file__).resolve().parent
+PROMPTS_PATH = DATA_DIR / 'prompts.json'
+MANIFEST_VERSION = 1
+READY_VERSION = 1
+# Target.kind from machine_translate -> TranslationMemory kind.
+TM_KINDS = {'name': 'name', 'description': 'desc', 'label': 'label'}
+# Filters resolved per lookup batch in --stream mode.
+STREAM_BATCH_SIZE = 1000
 
 names_map = {
   "Bold Red Lip": {"ka": "მკვეთრი წითელი ტუჩსაცხი", "ru": "Яркие красные губы"},
@@ -124,18 +157,532 @@ desc_map = {
   "ANIMATION": {"ka": "ანიმაცია", "ru": "Анимация"}
 }
 
-for item in data['filters']:
+
+def _digest(value):
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def source_hash(item):
+    """Hash of the fields a filter is translated from, plus its current lookup keys."""
+    return _digest([
+        item.get('id'),
+        item.get('name_en'),
+        item.get('description_en'),
+        item.get('prompt'),
+        item.get('name_ka'),
+        item.get('description_ka'),
+    ])
+
+
+def _pending_keys(items, field):
+    """Lookup keys still holding source text (anything already in Georgian script is done)."""
+    return {item.get(field) for item in items if item.get(field) and not is_georgian(item[field])}
+
+
+def _pending_fields(item, names, descs):
+    """'name'/'description' fields of a filter still holding source text no lookup could translate."""
+    return [
+        field for field, resolved in (('name', names), ('description', descs))
+        if item.get(f'{field}_ka') and not is_georgian(item[f'{field}_ka']) and item[f'{field}_ka'] not in resolved
+    ]
+
+
+def _is_pending(item, names, descs):
+    return bool(_pending_fields(item, names, descs))
+
+
+class MapLookup:
+    """Exact-match lookups straight from names_map/desc_map."""
+
+    def version(self):
+        return {'names': _digest(names_map), 'desc': _digest(desc_map)}
+
+    def resolve(self, items):
+        names = {k: names_map[k] for k in _pending_keys(items, 'name_ka') if k in names_map}
+        descs = {k: desc_map[k] for k in _pending_keys(items, 'description_ka') if k in desc_map}
+        return names, descs, []
+
+
+class MemoryLookup:
+    """Batched normalized/fuzzy lookups against a TranslationMemory seeded from the maps.
+
+    With ``apply_fuzzy=False`` fuzzy matches are only reported: the entries stay
+    pending (and are re-checked next run) until someone adds the translation.
+    """
+
+    def __init__(self, tm, apply_fuzzy=True):
+        self.tm = tm
+        self.apply_fuzzy = apply_fuzzy
+        added = tm.import_map('name', names_map) + tm.import_map('desc', desc_map)
+        if added:
+            print(f"Translation memory: {added} entries added/updated from maps")
+
+    def version(self):
+        return {'tm': self.tm.revision(), 'fuzzy': self.apply_fuzzy}
+
+    def resolve(self, items):
+        fuzzy = []
+        resolved = []
+        for kind, field in (('name', 'name_ka'), ('desc', 'description_ka')):
+            found = {}
+            for text, match in self.tm.lookup_many(kind, _pending_keys(items, field)).items():
+                if match.score < 1.0:
+                    fuzzy.append((text, match))
+                    if not self.apply_fuzzy:
+                        continue
+                found[text] = {'ka': match.ka, 'ru': match.ru}
+            resolved.append(found)
+        return resolved[0], resolved[1], fuzzy
+
+
+def resolve_lookups(lookup, items, metrics=None):
+    """lookup.resolve(items), recording lookup time and hits/misses/fuzzy matches in metrics."""
+    if metrics is None:
+        return lookup.resolve(items)
+    with metrics.stage('lookup'):
+        names, descs, fuzzy = lookup.resolve(items)
+    pending = len(_pending_keys(items, 'name_ka')) + len(_pending_keys(items, 'description_ka'))
+    metrics.lookups['hits'] += len(names) + len(descs)
+    metrics.lookups['misses'] += pending - len(names) - len(descs)
+    metrics.lookups['fuzzy'] += len(fuzzy)
+    return names, descs, fuzzy
+
+
+def map_hash(item, names, descs):
+    """Hash of the translations a filter would pick up on this pass."""
+    return _digest([names.get(item.get('name_ka')), descs.get(item.get('description_ka'))])
+
+
+def translate_filter(item, names, descs):
+    """Apply resolved name/description translations to a filter in place. Returns True if it changed."""
+    changed = False
+
     name_eng = item.get('name_ka')
-    if name_eng in names_map:
-        item['name_ka'] = names_map[name_eng]['ka']
-        item['name_ru'] = names_map[name_eng]['ru']
-    
+    if name_eng in names:
+        for locale in ('ka', 'ru'):
+            if item.get(f'name_{locale}') != names[name_eng][locale]:
+                item[f'name_{locale}'] = names[name_eng][locale]
+                changed = True
+
     desc_eng = item.get('description_ka')
-    if desc_eng in desc_map:
-        item['description_ka'] = desc_map[desc_eng]['ka']
-        item['description_ru'] = desc_map[desc_eng]['ru']
+    if desc_eng in descs:
+        for locale in ('ka', 'ru'):
+            if item.get(f'description_{locale}') != descs[desc_eng][locale]:
+                item[f'description_{locale}'] = descs[desc_eng][locale]
+                changed = True
+
+    return changed
+
+
+def report_lookups(items, names, descs, fuzzy):
+    for text, match in fuzzy:
+        applied = text in names or text in descs
+        print(f"  fuzzy{'' if applied else ' (not applied)'}: {text!r} -> {match.source!r} ({match.score:.2f})")
+    untranslated = [item['id'] for item in items if _is_pending(item, names, descs)]
+    if untranslated:
+        print(f"  untranslated: {', '.join(untranslated)}")
+
+
+def serialize(data):
+    return (json.dumps(data, indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def load_manifest(path):
+    try:
+        manifest = json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_if_changed(path, payload, metrics=None):
+    """Atomically write payload to path unless the file already holds exactly those bytes."""
+    try:
+        if path.read_bytes() == payload:
+            return False
+    except FileNotFoundError:
+        pass
+    with atomic_writer(path) as f:
+        f.write(payload)
+    if metrics is not None:
+        metrics.wrote(path, len(payload))
+    return True
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_manifest(manifest):
+    return (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8')
+
+
+def write_ready_marker(path, catalog_path, artifacts, metrics):
+    """Tell pollers (the server) a consistent catalog + artifact set is on disk.
+
+    The marker is only rewritten when the catalog or an artifact actually
+    changed, so its mtime/content changing is the hot-reload signal. The
+    catalog hash is the one this run built from, not a re-read of the file.
+    ``artifacts`` maps each artifact name to its sha256.
+    """
+    state = {
+        'catalog': metrics.digests.get(catalog_path.name) or file_digest(catalog_path),
+        'artifacts': dict(sorted(artifacts.items())),
+    }
+    try:
+        previous = json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        previous = {}
+    if previous.get('version') == READY_VERSION and {k: previous.get(k) for k in state} == state:
+        return False
+    marker = {'version': READY_VERSION, 'run': metrics.run, 'catalogPath': catalog_path.name, **state}
+    return write_if_changed(path, (json.dumps(marker, indent=2) + '\n').encode('utf-8'), metrics)
+
+
+def run_mt_stage(data, items, names, descs, mt, tm):
+    """Machine-translate whatever the lookups left pending. Returns the changed targets."""
+    pending = [(item, field) for item in items for field in _pending_fields(item, names, descs)]
+    sources = [item[f'{field}_ka'] for item, field in pending]
+    changed, translations, errors = machine_translate(
+        data, pending, mt['translator'], mt['checkpoint'], mt['concurrency'], mt['max_retries'])
+
+    if tm and changed:
+        rows = {}
+        for target in changed:
+            rows.setdefault(TM_KINDS[target.kind], []).append(
+                (target.source, target.container[target.ka_field], target.container[target.ru_field]))
+        for kind, kind_rows in rows.items():
+            tm.add_many(kind, kind_rows)
+
+    # Machine-translated filter text now counts as resolved, so it is not
+    # reported as untranslated (brand names a backend keeps in Latin included).
+    for (item, field), source in zip(pending, sources):
+        ka, ru = translations.get((source, 'ka')), translations.get((source, 'ru'))
+        if ka is not None and ru is not None:
+            (names if field == 'name' else descs)[item[f'{field}_ka']] = {'ka': ka, 'ru': ru}
+
+    print(f"Machine translation: {len(changed)} strings written back, {len(errors)} failed batches")
+    for err in errors:
+        print(f"  failed batch: {err!r}")
+    return changed
+
+
+def run_full(prompts_path, lookup, mt=None, tm=None, metrics=None):
+    metrics = metrics or RunMetrics('full')
+    with metrics.stage('load'):
+        data = json.loads(prompts_path.read_bytes())
+    names, descs, fuzzy = resolve_lookups(lookup, data['filters'], metrics)
+    with metrics.stage('translate'):
+        translated = sum(translate_filter(item, names, descs) for item in data['filters'])
+    if mt:
+        with metrics.stage('mt'):
+            translated += len(run_mt_stage(data, data['filters'], names, descs, mt, tm))
+    with metrics.stage('serialize'):
+        payload = serialize(data)
+    with metrics.stage('write'):
+        with atomic_writer(prompts_path) as f:
+            f.write(payload)
+    metrics.wrote(prompts_path, len(payload))
+    metrics.produced(prompts_path, hashlib.sha256(payload).hexdigest())
+    untranslated = sum(_is_pending(item, names, descs) for item in data['filters'])
+    metrics.count('total', len(data['filters']))
+    metrics.count('checked', len(data['filters']))
+    metrics.count('translated', translated)
+    metrics.count('untranslated', untranslated)
+    print(f"Filters: {len(data['filters'])} total, {translated} translated, {untranslated} untranslated")
+    report_lookups(data['filters'], names, descs, fuzzy)
+    return data
+
+
+def run_incremental(prompts_path, manifest_path, lookup, mt=None, tm=None, metrics=None):
+    metrics = metrics or RunMetrics('incremental')
+    with metrics.stage('load'):
+        raw = prompts_path.read_bytes()
+        data = json.loads(raw)
+        manifest = load_manifest(manifest_path) or {}
+    previous = manifest.get('filters', {})
+    maps = lookup.version()
+    maps_changed = manifest.get('maps') != maps
+
+    # Only entries whose source changed (or every entry, if the maps changed)
+    # need lookups; resolve them all in one batch.
+    source_fresh = {}
+    for item in data['filters']:
+        record = previous.get(item.get('id'))
+        # Entries left untranslated stay candidates so later map/TM additions reach them.
+        source_fresh[id(item)] = (record is not None and record['source'] == source_hash(item)
+                                  and not record.get('pending'))
+    candidates = [item for item in data['filters'] if maps_changed or not source_fresh[id(item)]]
+    names, descs, fuzzy = resolve_lookups(lookup, candidates, metrics)
+
+    entries = {}
+    touched = []
+    skipped = 0
+    with metrics.stage('translate'):
+        for item in data['filters']:
+            record = previous.get(item.get('id'))
+            fresh = source_fresh[id(item)]
+            if fresh and maps_changed:
+                fresh = record['map'] == map_hash(item, names, descs)
+            if fresh:
+                entries[item['id']] = record
+                skipped += 1
+                continue
+
+            if translate_filter(item, names, descs):
+                touched.append(item['id'])
+
+    mt_changed = []
+    if mt:
+        with metrics.stage('mt'):
+            mt_changed = run_mt_stage(data, candidates, names, descs, mt, tm)
+    for filter_id in dict.fromkeys(t.container['id'] for t in mt_changed if t.kind in ('name', 'description')):
+        if filter_id not in touched:
+            touched.append(filter_id)
+    labels_changed = any(t.kind == 'label' for t in mt_changed)
+
+    for item in candidates:
+        if item['id'] in entries:
+            continue
+        entries[item['id']] = {'source': source_hash(item), 'map': map_hash(item, names, descs)}
+        if _is_pending(item, names, descs):
+            entries[item['id']]['pending'] = True
+
+    removed = sorted(set(previous) - set(entries))
+    input_hash = hashlib.sha256(raw).hexdigest()
+
+    # Nothing was re-translated and the file is what we wrote last time:
+    # skip serializing the document at all.
+    if not touched and not labels_changed and manifest.get('output') == input_hash:
+        wrote = False
+        output_hash = input_hash
+    else:
+        with metrics.stage('serialize'):
+            payload = serialize(data)
+        with metrics.stage('write'):
+            wrote = write_if_changed(prompts_path, payload, metrics)
+        output_hash = hashlib.sha256(payload).hexdigest()
+    metrics.produced(prompts_path, output_hash)
+
+    new_manifest = {
+        'version': MANIFEST_VERSION,
+        'maps': maps,
+        'output': output_hash,
+        'filters': entries,
+    }
+    if 'artifacts' in manifest:
+        # run_build's records; it checks them against the catalog it builds from.
+        new_manifest['artifacts'] = manifest['artifacts']
+    with metrics.stage('write'):
+        write_if_changed(manifest_path, _encode_manifest(new_manifest), metrics)
+
+    untranslated = sum(_is_pending(item, names, descs) for item in candidates)
+    metrics.count('total', len(entries))
+    metrics.count('checked', len(entries) - skipped)
+    metrics.count('translated', len(touched))
+    metrics.count('untranslated', untranslated)
+    print(f"Filters: {len(entries)} total, {len(entries) - skipped} checked, {skipped} unchanged, {len(touched)} translated")
+    for filter_id in touched:
+        print(f"  translated {filter_id}")
+    for filter_id in removed:
+        print(f"  removed {filter_id}")
+    report_lookups(candidates, names, descs, fuzzy)
+    print(f"{prompts_path.name}: {'written' if wrote else 'unchanged, not written'}")
+    return data
+
+
+def translate_stage(lookup, counters, batch_size=STREAM_BATCH_SIZE, metrics=None):
+    """Streaming stage: resolve lookups a batch of filters at a time, then translate them."""
+    def stage(items):
+        for batch in _batched(items, batch_size):
+            names, descs, fuzzy = resolve_lookups(lookup, batch, metrics)
+            counters['fuzzy'] += len(fuzzy)
+            for item in batch:
+                if translate_filter(item, names, descs):
+                    counters['translated'] += 1
+                if _is_pending(item, names, descs):
+                    counters['untranslated'] += 1
+            yield from batch
+    return stage
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_stream(prompts_path, lookup, metrics=None):
+    metrics = metrics or RunMetrics('stream')
+    counters = {'translated': 0, 'untranslated': 0, 'fuzzy': 0}
+    # Reading, translating and writing are interleaved, so they are one stage
+    # here ('lookup' is timed inside it).
+    with metrics.stage('stream'):
+        wrote, seen, digest = stream_catalog(prompts_path, prompts_path,
+                                     [translate_stage(lookup, counters, metrics=metrics)])
+    if wrote:
+        metrics.wrote(prompts_path, prompts_path.stat().st_size)
+    metrics.produced(prompts_path, digest)
+    metrics.count('total', seen)
+    metrics.count('checked', seen)
+    metrics.count('translated', counters['translated'])
+    metrics.count('untranslated', counters['untranslated'])
+    print(f"Filters: {seen} streamed, {counters['translated']} translated, "
+          f"{counters['fuzzy']} fuzzy matches, {counters['untranslated']} untranslated")
+    print(f"{prompts_path.name}: {'written' if wrote else 'unchanged, not written'}")
+
+
+def _outputs_intact(record, out_dir):
+    """Whether every file a builder produced is still on disk with the bytes it wrote."""
+    try:
+        return all(file_digest(out_dir / name) == digest for name, digest in record['outputs'].items())
+    except FileNotFoundError:
+        return False
+
+
+def run_build(data, out_dir, metrics=None, manifest_path=None):
+    """Build and write the artifacts. Returns {name: sha256 of its bytes}.
+
+    With a manifest, each builder's input digest and output digests are kept
+    in its ``artifacts`` section, and builders whose input is unchanged and
+    whose outputs are intact on disk are skipped.
+    """
+    metrics = metrics or RunMetrics('build')
+    manifest = (load_manifest(manifest_path) or {}) if manifest_path else {}
+    previous = manifest.get('artifacts', {})
+    notes = []
+    records = {}
+    built = {}
+    with metrics.stage('build'):
+        inputs = builder_inputs(data)
+        for name in BUILDERS:
+            record = previous.get(name)
+            if record and record['input'] == inputs[name] and _outputs_intact(record, out_dir):
+                records[name] = record
+            else:
+                built[name] = run_builder(name, data, notes)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with metrics.stage('write'):
+        for name in BUILDERS:
+            if name in records:
+                for filename in records[name]['outputs']:
+                    print(f"  {filename}: inputs unchanged, not rebuilt")
+                continue
+            for filename, payload in built[name].items():
+                wrote = write_if_changed(out_dir / filename, payload, metrics)
+                print(f"  {filename}: {len(payload)} bytes{'' if wrote else ' (unchanged)'}")
+            records[name] = {
+                'input': inputs[name],
+                'outputs': {filename: hashlib.sha256(payload).hexdigest() for filename, payload in built[name].items()},
+            }
+        if manifest_path:
+            manifest['artifacts'] = records
+            write_if_changed(manifest_path, _encode_manifest(manifest), metrics)
+    for note in notes:
+        print(f"  {note}")
+    return {filename: digest for record in records.values() for filename, digest in record['outputs'].items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Translate filter names and descriptions in prompts.json.')
+    parser.add_argument('--input', type=Path, default=PROMPTS_PATH, help='catalog to translate in place')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-translate entries whose source or mapping changed and skip no-op writes')
+    parser.add_argument('--manifest', type=Path, default=None,
+                        help='sidecar manifest for --incremental (default: <input>.manifest.json)')
+    parser.add_argument('--build', action='store_true',
+                        help='emit per-locale metadata bundles and the indexed prompt store')
+    parser.add_argument('--out-dir', type=Path, default=None,
+                        help='directory for --build artifacts (default: next to the input)')
+    parser.add_argument('--tm', type=Path, default=None,
+                        help='SQLite translation memory to use instead of exact map lookups (seeded from the maps)')
+    parser.add_argument('--fuzzy-threshold', type=float, default=None,
+                        help=f'minimum similarity for fuzzy --tm matches (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--review-fuzzy', action='store_true',
+                        help='report fuzzy --tm matches without writing them into the catalog')
+    parser.add_argument('--mt', metavar='BACKEND', default=None,
+                        help="machine-translate strings the lookups missed with a 'module:factory' backend")
+    parser.add_argument('--mt-concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'concurrent --mt batches (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--mt-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'retries per rate-limited --mt batch (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--mt-checkpoint', type=Path, default=None,
+                        help='JSONL checkpoint for --mt (default: <input>.mt-checkpoint.jsonl)')
+    parser.add_argument('--stream', action='store_true',
+                        help='translate filters item-by-item with flat memory; '
+                             'cannot be combined with --incremental, --build or --mt')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='append this run\'s stage timings, counts and bytes written as a JSON line')
+    parser.add_argument('--ready-marker', type=Path, default=None,
+                        help='after a successful run, (re)write this marker if the catalog or artifacts changed')
+    args = parser.parse_args(argv)
+    if args.stream and (args.incremental or args.build or args.mt):
+        parser.error('--stream cannot be combined with --incremental, --build or --mt')
+    if not args.tm and (args.review_fuzzy or args.fuzzy_threshold is not None):
+        parser.error('--review-fuzzy and --fuzzy-threshold need --tm')
+    if args.fuzzy_threshold is None:
+        args.fuzzy_threshold = DEFAULT_THRESHOLD
+
+    mt = None
+    if args.mt:
+        try:
+            translator = load_translator(args.mt)
+        except ValueError as err:
+            parser.error(f'--mt: {err}')
+        mt = {
+            'translator': translator,
+            'checkpoint': args.mt_checkpoint or args.input.with_suffix('.mt-checkpoint.jsonl'),
+            'concurrency': args.mt_concurrency,
+            'max_retries': args.mt_retries,
+        }
+
+    metrics = RunMetrics('stream' if args.stream else 'incremental' if args.incremental else 'full')
+    # Only --incremental keeps a manifest; a full run rebuilds every artifact.
+    manifest_path = (args.manifest or args.input.with_suffix('.manifest.json')) if args.incremental else None
+    try:
+        data = None
+        tm = TranslationMemory(args.tm, threshold=args.fuzzy_threshold) if args.tm else None
+        lookup = MemoryLookup(tm, apply_fuzzy=not args.review_fuzzy) if tm else MapLookup()
+        try:
+            if args.stream:
+                run_stream(args.input, lookup, metrics)
+            elif args.incremental:
+                data = run_incremental(args.input, manifest_path, lookup, mt, tm, metrics)
+            else:
+                data = run_full(args.input, lookup, mt, tm, metrics)
+        finally:
+            if tm:
+                tm.close()
+                metrics.produced(args.tm, file_digest(args.tm))
+
+        artifacts = {}
+        if args.build:
+            print("Build artifacts:")
+            artifacts = run_build(data, args.out_dir or args.input.parent, metrics, manifest_path)
+        if args.ready_marker:
+            wrote = write_ready_marker(args.ready_marker, args.input, artifacts, metrics)
+            print(f"{args.ready_marker.name}: {'written' if wrote else 'unchanged, not written'}")
+        metrics.finish(ok=True)
+    except BaseException:
+        metrics.finish(ok=False)
+        raise
+    finally:
+        if args.metrics:
+            metrics.append_to(args.metrics)
+    print(f"Run: {format_metrics(metrics.to_json())}")
 
-with open('C:/Users/User/Desktop/GITHUB/lashme/server/src/modules/filters/data/prompts.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
 
-print("Translation processed!")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""SQLite-backed translation memory for filter names and descriptions.
+
+Entries are keyed on a normalized form of the English source (NFKC, folded
+quotes/dashes, collapsed whitespace, casefold), so "Valentine’s Day" and
+"Valentine's  day" hit the same row. Misses fall back to a trigram index that
+proposes fuzzy candidates, scored with difflib and accepted above a threshold.
+Lookups are batched per call and fronted by an in-process LRU.
+"""
+import difflib
+import re
+import sqlite3
+import unicodedata
+from collections import OrderedDict, namedtuple
+
+Match = namedtuple('Match', 'source ka ru score')
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_CACHE_SIZE = 4096
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+QUERY_CHUNK = 500
+FUZZY_CANDIDATES = 8
+
+_QUOTES = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'", '`': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"', '«': '"', '»': '"',
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '−': '-',
+})
+_WHITESPACE = re.compile(r'\s+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind   TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    source TEXT NOT NULL,
+    ka     TEXT NOT NULL,
+    ru     TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS grams (
+    kind TEXT NOT NULL,
+    gram TEXT NOT NULL,
+    key  TEXT NOT NULL,
+    PRIMARY KEY (kind, gram, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('revision', 0);
+"""
+
+
+def normalize_key(text):
+    text = unicodedata.normalize('NFKC', text).translate(_QUOTES)
+    return _WHITESPACE.sub(' ', text).strip().casefold()
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _chunks(items, size=QUERY_CHUNK):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class TranslationMemory:
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def revision(self):
+        """Counter bumped on every write; used by --incremental as the TM version."""
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'revision'").fetchone()[0]
+
+    def add_many(self, kind, rows):
+        """Upsert (source, ka, ru) rows. Returns the number of rows actually changed."""
+        changed = 0
+        with self._conn:
+            for source, ka, ru in rows:
+                key = normalize_key(source)
+                cur = self._conn.execute(
+                    'INSERT INTO entries (kind, key, source, ka, ru) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (kind, key) DO UPDATE SET source = excluded.source, ka = excluded.ka, ru = excluded.ru '
+                    'WHERE entries.ka != excluded.ka OR entries.ru != excluded.ru',
+                    (kind, key, source, ka, ru),
+                )
+                if cur.rowcount:
+                    changed += 1
+                    self._conn.executemany(
+                        'INSERT OR IGNORE INTO grams (kind, gram, key) VALUES (?, ?, ?)',
+                        [(kind, gram, key) for gram in trigrams(key)],
+                    )
+            if changed:
+                self._conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'revision'")
+                # Cached misses and fuzzy matches may resolve differently now.
+                self._cache.clear()
+        return changed
+
+    def import_map(self, kind, mapping):
+        """Seed from a names_map/desc_map style {source: {'ka': ..., 'ru': ...}} dict."""
+        return self.add_many(kind, ((source, t['ka'], t['ru']) for source, t in mapping.items()))
+
+    def _remember(self, cache_key, match):
+        self._cache[cache_key] = match
+        self._cache.move_to_end(cache_key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _exact(self, kind, keys):
+        found = {}
+        for chunk in _chunks(keys):
+            marks = ','.join('?' * len(chunk))
+            for key, source, ka, ru in self._conn.execute(
+                f'SELECT key, source, ka, ru FROM entries WHERE kind = ? AND key IN ({marks})',
+                [kind, *chunk],
+            ):
+                found[key] = Match(source, ka, ru, 1.0)
+        return found
+
+    def _fuzzy(self, kind, keys):
+        key_grams = {key: trigrams(key) for key in keys}
+        all_grams = set().union(*key_grams.values()) if key_grams else set()
+
+        gram_keys = {}
+        for chunk in _chunks(all_grams):
+            marks = ','.join('?' * len(chunk))
+            for gram, key in self._conn.execute(
+                f'SELECT gram, key FROM grams WHERE kind = ? AND gram IN ({marks})',
+                [kind, *chunk],
+            ):
+                gram_keys.setdefault(gram, []).append(key)
+
+        shortlist = {}
+        for key, grams in key_grams.items():
+            overlap = {}
+            for gram in grams:
+                for candidate in gram_keys.get(gram, ()):
+                    overlap[candidate] = overlap.get(candidate, 0) + 1
+            best = sorted(overlap, key=lambda c: (-overlap[c], c))[:FUZZY_CANDIDATES]
+            shortlist[key] = [c for c in best if 2 * overlap[c] / (len(grams) + len(trigrams(c))) >= self.threshold / 2]
+
+        candidates = self._exact(kind, {c for cs in shortlist.values() for c in cs})
+        found = {}
+        for key, cs in shortlist.items():
+            scored = [(difflib.SequenceMatcher(None, key, c).ratio(), c) for c in cs if c in candidates]
+            if not scored:
+                continue
+            score, best = max(scored, key=lambda sc: (sc[0], sc[1]))
+            if score >= self.threshold:
+                found[key] = candidates[best]._replace(score=round(score, 4))
+        return found
+
+    def lookup_many(self, kind, texts, fuzzy=True):
+        """Resolve many source strings at once. Returns {text: Match} for every hit."""
+        results = {}
+        pending = {}
+        for text in texts:
+            if not text:
+                continue
+            key = normalize_key(text)
+            cache_key = (kind, key, fuzzy)
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                if self._cache[cache_key] is not None:
+                    results[text] = self._cache[cache_key]
+            else:
+                pending.setdefault(key, []).append(text)
+
+        if pending:
+            found = self._exact(kind, pending)
+            misses = [key for key in pending if key not in found]
+            if fuzzy and misses:
+                found.update(self._fuzzy(kind, misses))
+            for key, originals in pending.items():
+                match = found.get(key)
+                self._remember((kind, key, fuzzy), match)
+                if match is not None:
+                    for text in originals:
+                        results[text] = match
+        return results
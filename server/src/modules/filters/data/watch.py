@@ -0,0 +1,270 @@
+"""Watch mode: rebuild the catalog whenever its sources change.
+
+    python watch.py                    # prompts.json, the maps in translate.py and the build modules
+    python watch.py --tm tm.sqlite     # also the translation memory
+    python watch.py --poll             # mtime polling instead of inotify
+
+Changes are picked up with inotify on Linux (through libc, no extra
+packages) and by polling mtimes elsewhere. A burst of events, such as an
+editor's save-and-rename or a checkout touching several files, is collapsed
+until nothing has changed for ``--debounce`` seconds. A rebuild then runs
+only if a source's content differs from what the last build consumed, so
+touches and the watcher's own writes to prompts.json do not loop.
+
+Each rebuild is ``translate.py --incremental --build`` in a subprocess. Map
+edits take effect without restarting the watcher, and a half-saved
+translate.py fails that one run instead of the watcher. Only re-translated
+entries are touched. Artifacts whose part of the catalog did not change are
+not rebuilt, and unchanged ones are not rewritten. After a
+successful run that changed anything, the ready marker
+(prompts.ready.json by default) is rewritten. The server can poll it to
+hot-reload the catalog. Per-run metrics are appended to
+prompts.metrics.jsonl (see metrics.py).
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from metrics import format_metrics
+from translation_memory import DEFAULT_THRESHOLD
+
+DATA_DIR = Path(__file__).resolve().parent
+PROMPTS_PATH = DATA_DIR / 'prompts.json'
+TRANSLATE_SCRIPT = DATA_DIR / 'translate.py'
+# translate.py holds the maps; the rest decide what the artifacts look like.
+BUILD_SOURCES = ('translate.py', 'bundles.py', 'templates.py', 'fragments.py', 'search_index.py',
+                 'streaming.py', 'translation_memory.py', 'metrics.py')
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+
+# <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Directory watches through libc's inotify; wait() returns the names that had events."""
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._names = {}
+        # Watch directories, not files: atomic saves replace the inode.
+        # SQLite keeps its file open, so IN_MODIFY is needed to see TM updates.
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MODIFY
+        for directory in sorted({p.parent for p in paths}):
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+            self._names[wd] = {p.name: p for p in paths if p.parent == directory}
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        buf = os.read(self._fd, 64 * 1024)
+        changed = set()
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _, length = _EVENT.unpack_from(buf, pos)
+            name = buf[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0').decode(errors='replace')
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; treat everything as possibly changed.
+                changed.update(p for names in self._names.values() for p in names.values())
+            elif name in self._names.get(wd, {}):
+                changed.add(self._names[wd][name])
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares (mtime, size) every ``interval`` seconds."""
+
+    def __init__(self, paths, interval=DEFAULT_POLL_INTERVAL):
+        self._paths = list(paths)
+        self._interval = interval
+        self._seen = self._snapshot()
+
+    def _snapshot(self):
+        stats = {}
+        for path in self._paths:
+            try:
+                st = path.stat()
+                stats[path] = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                stats[path] = None
+        return stats
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            changed = {p for p in self._paths if current[p] != self._seen[p]}
+            self._seen = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            pause = self._interval if deadline is None else min(self._interval, deadline - time.monotonic())
+            time.sleep(max(pause, 0))
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, poll=False, interval=DEFAULT_POLL_INTERVAL):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as exc:
+            print(f"inotify unavailable ({exc}); polling every {interval}s")
+    return PollingWatcher(paths, interval)
+
+
+def digest(path):
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def collect(watcher, debounce):
+    """Block for the first change, then keep collecting until ``debounce`` seconds pass quietly."""
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+def build_command(args):
+    cmd = [sys.executable, str(TRANSLATE_SCRIPT), '--input', str(args.input), '--incremental', '--build',
+           '--metrics', str(args.metrics), '--ready-marker', str(args.ready_marker)]
+    if args.out_dir:
+        cmd += ['--out-dir', str(args.out_dir)]
+    if args.tm:
+        cmd += ['--tm', str(args.tm), '--fuzzy-threshold', str(args.fuzzy_threshold)]
+    return cmd
+
+
+def _size(path):
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def appended_metrics(path, offset):
+    """The record translate.py appended past ``offset``, if the run got that far."""
+    if _size(path) <= offset:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        lines = f.read().decode('utf-8').splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def rebuild(args, reason):
+    """Run one build. Returns its metrics record if it succeeded, else None."""
+    offset = _size(args.metrics)
+    print(f"[{time.strftime('%H:%M:%S')}] rebuilding ({reason})", flush=True)
+    result = subprocess.run(build_command(args), capture_output=True, text=True, cwd=DATA_DIR)
+    record = appended_metrics(args.metrics, offset)
+    if result.returncode == 0:
+        if args.verbose:
+            print(result.stdout, end='')
+        print(f"  {format_metrics(record) if record else 'ok'}", flush=True)
+        return record or {}
+    print(f"  build failed (exit {result.returncode}); catalog and ready marker left as they were", flush=True)
+    for line in (result.stderr or result.stdout).strip().splitlines()[-15:]:
+        print(f"    {line}", flush=True)
+    return None
+
+
+def settle(consumed, outputs, record):
+    """Take the post-build baseline of files the build rewrites from what the build reported.
+
+    Re-reading them here would fold in a save made while the build ran,
+    and that save would then never be rebuilt.
+    """
+    for path in outputs:
+        reported = (record or {}).get('digests', {}).get(path.name)
+        if reported:
+            consumed[path] = reported
+
+
+def watch(args):
+    sources = [args.input] + [DATA_DIR / name for name in BUILD_SOURCES]
+    if args.tm:
+        sources.append(args.tm)
+    # Files the build itself may rewrite; their baseline comes from the build's metrics.
+    outputs = [args.input] + ([args.tm] if args.tm else [])
+
+    watcher = make_watcher(sources, args.poll, args.poll_interval)
+    print(f"Watching {', '.join(p.name for p in sources)} with {type(watcher).__name__} "
+          f"(debounce {args.debounce}s); Ctrl-C to stop", flush=True)
+    consumed = {p: digest(p) for p in sources}
+    try:
+        settle(consumed, outputs, rebuild(args, 'startup'))
+        while True:
+            collect(watcher, args.debounce)
+            current = {p: digest(p) for p in sources}
+            changed = [p.name for p in sources if current[p] != consumed[p]]
+            if not changed:
+                continue
+            consumed = current
+            settle(consumed, outputs, rebuild(args, ', '.join(changed)))
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the filter catalog whenever its sources change.')
+    parser.add_argument('--input', type=Path, default=PROMPTS_PATH, help='catalog to watch and translate')
+    parser.add_argument('--out-dir', type=Path, default=None,
+                        help='directory for build artifacts (default: next to the input)')
+    parser.add_argument('--tm', type=Path, default=None, help='translation memory to use and watch')
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_THRESHOLD, help='passed through with --tm')
+    parser.add_argument('--ready-marker', type=Path, default=None,
+                        help='marker rewritten after each build that changed something '
+                             '(default: <input>.ready.json)')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='JSONL file for per-run metrics (default: <input>.metrics.jsonl)')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f'quiet seconds to wait after the last change (default: {DEFAULT_DEBOUNCE})')
+    parser.add_argument('--poll', action='store_true', help='poll mtimes instead of using inotify')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'seconds between polls (default: {DEFAULT_POLL_INTERVAL})')
+    parser.add_argument('-v', '--verbose', action='store_true', help="show translate.py's full output")
+    args = parser.parse_args(argv)
+    args.input = args.input.resolve()
+    args.tm = args.tm.resolve() if args.tm else None
+    args.ready_marker = (args.ready_marker or args.input.with_suffix('.ready.json')).resolve()
+    args.metrics = (args.metrics or args.input.with_suffix('.metrics.jsonl')).resolve()
+    watch(args)
+
+
+if __name__ == '__main__':
+    main()